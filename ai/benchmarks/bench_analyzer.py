@@ -0,0 +1,94 @@
+# 질문 분석기 마이크로 벤치마크 (정답 코퍼스는 ai/tests/test_analyzer.py에 있고 pytest로도 검사)
+# 실행: python -m ai.benchmarks.bench_analyzer
+import datetime
+import re
+import timeit
+
+from ai.tests.test_analyzer import CORPUS, TODAY
+from ai.utils.analyzer import analyze
+
+
+# --- 비교 기준: 바뀌기 전 코드 그대로 (utils/date_helper.extract_date, utils/parser.QuestionParser, engine.ask) ---
+def _legacy_extract_date(question: str) -> str:
+    today = datetime.datetime.now()
+
+    # 요일 처리
+    day_map = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
+    for d_name, d_idx in day_map.items():
+        if d_name in question and "요일" in question or d_name in ["월", "화", "수", "목", "금"]:
+            if d_name in question:
+                days_diff = (d_idx - today.weekday() + 7) % 7
+                return (today + datetime.timedelta(days=days_diff)).strftime("%Y-%m-%d")
+
+    if "오늘" in question: return today.strftime("%Y-%m-%d")
+    if "내일" in question: return (today + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+
+    # 구체적 날짜 (MM월 DD일)
+    match = re.search(r"(\d{1,2})\s*월\s*(\d{1,2})\s*일", question)
+    if match:
+        m, d = match.groups()
+        return f"{today.year}-{int(m):02d}-{int(d):02d}"
+
+    return today.strftime("%Y-%m-%d")
+
+
+def _legacy_extract_grade_class(question: str):
+    match1 = re.search(r"(\d)\s*학년\s*(\d)\s*반", question)
+    if match1:
+        return match1.group(1), match1.group(2)
+    match2 = re.search(r"(\d)[/-](\d)", question)
+    if match2:
+        return match2.group(1), match2.group(2)
+    return None, None
+
+
+def _legacy_query_type(question: str) -> str:
+    if any(k in question for k in ["급식", "밥", "메뉴", "석식", "중식", "조식"]):
+        return "meal"
+    if any(k in question for k in ["시간표", "교시", "수업"]):
+        return "timetable"
+    return "general"
+
+
+def _legacy(question: str):
+    """예전 engine.ask가 답을 찾기 전에 질문을 분석하던 부분 (의도별로 실제로 거치던 경로)"""
+    q_type = _legacy_query_type(question)
+    date = _legacy_extract_date(question)
+    if q_type == "meal":
+        target_time = None
+        if any(k in question for k in ["아침", "조식"]): target_time = "조식"
+        elif any(k in question for k in ["점심", "중식"]): target_time = "중식"
+        elif any(k in question for k in ["저녁", "석식"]): target_time = "석식"
+        return q_type, date, target_time
+    if q_type == "timetable":
+        return q_type, date, _legacy_extract_grade_class(question)
+    pdf_keywords = ["인증제", "dsm", "기숙사", "우정관", "벌점", "상점", "규정"]
+    return q_type, date, any(kw in question.lower() for kw in pdf_keywords)
+
+
+def check_corpus() -> int:
+    failures = 0
+    for question, expected in CORPUS:
+        parsed = analyze(question, today=TODAY)
+        for name, value in expected.items():
+            actual = getattr(parsed, name)
+            if actual != value:
+                failures += 1
+                print(f"실패: {question!r} {name} = {actual!r} (기대값 {value!r})")
+    print(f"코퍼스 {len(CORPUS)}개 질문 검사, 실패 {failures}건")
+    return failures
+
+
+def bench(number: int = 2000):
+    questions = [q for q, _ in CORPUS]
+    # legacy는 매번 현재 시각을 읽으므로 analyze도 today 없이(실제 서빙과 같게) 잰다. 5회 중 최솟값
+    for name, fn in (("analyze", analyze), ("legacy", _legacy)):
+        seconds = min(timeit.repeat(lambda: [fn(q) for q in questions], number=number, repeat=5))
+        per_query = seconds / (number * len(questions)) * 1e6
+        print(f"{name:8s} {per_query:8.2f} us/질문")
+
+
+if __name__ == "__main__":
+    failed = check_corpus()
+    bench()
+    raise SystemExit(1 if failed else 0)
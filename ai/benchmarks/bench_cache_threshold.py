@@ -0,0 +1,65 @@
+# 답변 캐시 유사도 임계값 점검: 실제 Gemini 임베딩으로 '답이 달라야 하는 질문 쌍'과 '같은 질문의 다른 표현 쌍'의
+# 코사인 유사도를 재서 Settings.ANSWER_CACHE_SIMILARITY가 둘 사이에 있는지 확인한다.
+# 실행: GOOGLE_API_KEY=... python -m ai.benchmarks.bench_cache_threshold
+# 범위(answer_scope)가 다른 쌍은 유사도와 상관없이 캐시를 나눠 쓰지 않으므로 임계값 판정에서 뺀다.
+import sys
+
+import numpy as np
+
+from ai.core.cache import answer_scope
+from ai.core.config import Settings
+from ai.utils.analyzer import analyze
+
+# 답이 달라야 하는 질문 쌍
+NEAR_MISSES = [
+    ("벌점 규정 알려줘", "상점 규정 알려줘"),
+    ("기숙사 입사 신청 언제까지야", "기숙사 퇴사 신청 언제까지야"),
+    ("중간고사 시험 범위 알려줘", "기말고사 시험 범위 알려줘"),
+    ("도서관 대출 기간이 며칠이야", "도서관 반납 기간이 며칠이야"),
+    ("교복 구매 안내", "체육복 구매 안내"),
+    ("1학년 1반 시간표", "1학년 2반 시간표"),
+    ("3월 5일 행사 뭐 있어", "3월 6일 행사 뭐 있어"),
+    ("학칙 제12조 내용", "학칙 제13조 내용"),
+]
+
+# 같은 답을 써도 되는 질문 쌍
+PARAPHRASES = [
+    ("기숙사 귀가 신청 언제까지야", "기숙사 귀가 신청은 언제까지 해야 돼?"),
+    ("도서관 운영 시간 알려줘", "도서관 몇 시까지 열어?"),
+    ("벌점 규정 알려줘", "벌점 규정이 어떻게 돼?"),
+    ("체육대회 언제야", "체육대회 날짜 알려줘"),
+]
+
+
+def _cosine(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def check(embeddings, threshold: float) -> bool:
+    """쌍마다 유사도를 출력하고, 같은 범위의 오답 쌍이 임계값을 넘지 않으면 True"""
+    texts = sorted({q for pair in NEAR_MISSES + PARAPHRASES for q in pair})
+    vectors = dict(zip(texts, embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")))
+    ok = True
+    print(f"임계값 {threshold}")
+    print("[답이 달라야 하는 쌍]")
+    for a, b in NEAR_MISSES:
+        score = _cosine(vectors[a], vectors[b])
+        same_scope = answer_scope(analyze(a)) == answer_scope(analyze(b))
+        served = same_scope and score >= threshold
+        ok &= not served
+        note = "오답 제공" if served else ("범위가 달라 제외" if not same_scope else "통과")
+        print(f"  {score:.4f}  {a} / {b}  -> {note}")
+    print("[같은 답을 써도 되는 쌍] (임계값 미만이면 캐시를 놓칠 뿐 오답은 아님)")
+    for a, b in PARAPHRASES:
+        score = _cosine(vectors[a], vectors[b])
+        print(f"  {score:.4f}  {a} / {b}  -> {'적중' if score >= threshold else '미스'}")
+    return ok
+
+
+if __name__ == "__main__":
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    settings = Settings()
+    model = GoogleGenerativeAIEmbeddings(model=settings.EMBED_MODEL)
+    sys.exit(0 if check(model, settings.ANSWER_CACHE_SIMILARITY) else 1)
@@ -0,0 +1,51 @@
+# 문맥 패킹 벤치마크: 예전 방식(조각 10개 단순 연결)과 pack_context의 프롬프트 크기 비교
+# 실행: python -m ai.benchmarks.bench_context
+# DB_DIR의 어휘 인덱스가 있으면 실제 조각으로, 없으면 합성 조각으로 잰다.
+import os
+import random
+
+from langchain_community.docstore.document import Document
+
+from ai.core.config import Settings
+from ai.core.context import estimate_tokens, pack_context
+from ai.core.lexical import LexicalIndex
+
+QUESTIONS = ["기숙사 벌점 규정", "DSM 인증제 기준", "우정관 생활 수칙", "상점 받는 방법", "학교 축제 일정"]
+
+
+def _naive(results, max_docs: int) -> str:
+    return "\n\n".join(f"[출처: {d.metadata.get('source')}] {d.page_content}" for d, _ in results[:max_docs])
+
+
+def _synthetic_results(seed: int):
+    """300자 / 50자 겹침으로 자른 한 페이지에서 이웃한 조각이 섞여 검색된 상황"""
+    rng = random.Random(seed)
+    text = "".join(f"제{i}조 기숙사 생활 규정에 따라 항목 {i}을 지켜야 합니다. " for i in range(60))
+    chunks = [text[i:i + 300] for i in range(0, len(text) - 50, 250)]
+    picked = rng.sample(range(len(chunks)), 7)
+    results = [(Document(page_content=chunks[i], metadata={"source": "규정.pdf", "page": 0}), 0.0) for i in picked]
+    results += [(Document(page_content=f"공지 {n} " * 30, metadata={"source": "crawling.json"}), 0.0) for n in range(3)]
+    rng.shuffle(results)
+    return results
+
+
+def bench():
+    settings = Settings()
+    index = LexicalIndex(os.path.join(settings.DB_DIR, "lexical_index.json"))
+    if index.load() and index.ids():
+        cases = [index.search(q, k=settings.CONTEXT_DOCS) for q in QUESTIONS]
+        print("실제 어휘 인덱스 조각으로 측정")
+    else:
+        cases = [_synthetic_results(seed) for seed in range(len(QUESTIONS))]
+        print("어휘 인덱스가 없어 합성 조각으로 측정")
+
+    before = after = 0
+    for results in cases:
+        before += estimate_tokens(_naive(results, settings.CONTEXT_DOCS))
+        after += estimate_tokens(pack_context(results, settings.CONTEXT_DOCS, settings.CONTEXT_TOKEN_BUDGET) or "")
+    print(f"질문 {len(cases)}개 평균 문맥 토큰: {before / len(cases):.0f} -> {after / len(cases):.0f} "
+          f"({(1 - after / max(before, 1)) * 100:.1f}% 절감)")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,252 @@
+# 엔진 오프라인 벤치마크: 가짜 임베딩/LLM을 주입해 Gemini 쿼터 없이 시작 시간, 인덱스 구축 처리량,
+# 빠른 경로 지연, RAG 검색 지연, 골든 질문 검색 적중률을 재고 JSON으로 남긴다.
+# 실행: python -m ai.benchmarks.bench_engine [--out results.json] [--backend numpy] [--llm-latency 0.2]
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import zlib
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from ai.core.config import Settings
+from ai.core.engine import Dask_AI
+from ai.core.lexical import tokenize
+from ai.utils.analyzer import analyze
+
+# (제목, 본문) - 골든 질문이 찾아야 하는 공지
+NOTICES = [
+    ("기숙사 귀가 신청 안내", "기숙사 금요 귀가 신청은 목요일 오후 5시까지 사감실에 제출해야 합니다. 늦은 신청은 받지 않습니다."),
+    ("도서관 운영 시간 변경", "도서관은 3월부터 평일 오전 8시부터 오후 9시까지 운영합니다. 주말에는 휴관합니다."),
+    ("체육대회 일정", "체육대회는 5월 15일 운동장에서 열리며 우천 시 강당에서 진행합니다."),
+    ("방과후 프로그래밍 강좌", "방과후 파이썬 강좌 수강 신청은 학교 홈페이지에서 3월 10일까지 받습니다."),
+    ("교복 착용 규정", "동복은 11월부터 3월까지, 하복은 6월부터 8월까지 착용합니다. 생활복은 연중 허용됩니다."),
+    ("상점 부여 기준", "봉사 활동 10시간마다 상점 1점을 부여하며 학기당 최대 5점까지 인정합니다."),
+    ("분실물 센터 안내", "분실물은 본관 1층 행정실 옆 분실물 센터에서 찾을 수 있으며 한 달 뒤 폐기합니다."),
+    ("스쿨뱅킹 이체 안내", "수익자 부담금은 매월 25일 스쿨뱅킹으로 자동 이체됩니다. 잔액을 미리 확인해 주세요."),
+]
+
+# (질문, 정답 조각에 들어 있어야 하는 문구)
+GOLDEN = [
+    ("기숙사 귀가 신청 언제까지 해야 돼?", "귀가 신청은"),
+    ("도서관 몇 시까지 열어?", "도서관은 3월부터"),
+    ("체육대회 비 오면 어디서 해?", "체육대회는"),
+    ("파이썬 방과후 수강 신청 방법", "방과후 파이썬"),
+    ("하복은 언제부터 입어?", "하복은"),
+    ("봉사 활동 하면 상점 몇 점 받아?", "상점 1점"),
+    ("잃어버린 물건 분실물 어디서 찾아?", "분실물 센터"),
+    ("스쿨뱅킹 자동 이체 날짜", "스쿨뱅킹으로"),
+]
+
+FAST_PATH_QUESTIONS = ["오늘 급식 뭐야", "내일 점심 메뉴", "이번주 급식", "1학년 1반 시간표", "2-3 내일 시간표", "김철수 선생님 수업 언제야"]
+
+_FILLER_WORDS = ["학생회", "동아리", "수행평가", "봉사", "진로", "상담", "축제", "급식실", "강당", "교무실",
+                 "방송부", "안전교육", "현장체험", "시험", "성적", "출결", "학부모", "설문", "대회", "캠프"]
+
+
+class FakeEmbeddings(Embeddings):
+    """문자 바이그램을 해시해 만든 결정적 임베딩. 글자가 겹치는 문장일수록 가깝다"""
+
+    def __init__(self, dim: int = 256, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for term in tokenize(text):
+            vector[zlib.crc32(term.encode("utf-8")) % self.dim] += 1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._vector(text)
+
+
+def _write_fixtures(data_dir: str, filler: int):
+    """급식/시간표/공지 데이터를 오늘 날짜 기준으로 만든다"""
+    rng = random.Random(0)
+    today = datetime.date.today()
+    days = [today + datetime.timedelta(days=d) for d in range(-7, 8)]
+
+    meals = []
+    for day in days:
+        for slot in ("조식", "중식", "석식"):
+            dishes = rng.sample(["쌀밥", "김치", "된장국", "불고기", "순살치킨", "잡채", "우유", "과일"], 4)
+            meals.append({"날짜": day.strftime("%Y%m%d"), "시간": slot, "요리명": dishes,
+                          "칼로리": f"{rng.randint(600, 900)} Kcal", "알레르기": [[1, 5]] * len(dishes)})
+
+    weekdays = "월화수목금토일"
+    classes = {}
+    for grade in (1, 2, 3):
+        classes[f"{grade}학년"] = {
+            f"{c}반": {
+                f"{day.strftime('%Y%m%d')}-{weekdays[day.weekday()]}요일": {
+                    f"{p}교시": {"과목": rng.choice(["국어", "수학", "영어", "과학", "체육"]),
+                                "선생님": rng.choice(["김철수", "박영희", "이민호"])}
+                    for p in range(1, 8)
+                }
+                for day in days if day.weekday() < 5
+            }
+            for c in (1, 2, 3, 4)
+        }
+
+    posts = [{"title": t, "contents": c, "link": f"https://school.example/notice/{i}"} for i, (t, c) in enumerate(NOTICES)]
+    for i in range(filler):
+        words = " ".join(rng.choice(_FILLER_WORDS) for _ in range(rng.randint(20, 60)))
+        posts.append({"title": f"공지 {i}", "contents": f"공지 {i}: {words}", "link": f"https://school.example/filler/{i}"})
+
+    for name, data in (("school_meal.json", meals), ("comcigan.json", [classes]), ("crawling.json", {"crawling": posts})):
+        with open(os.path.join(data_dir, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def _settings(root: str, backend: str) -> Settings:
+    """임시 디렉터리를 쓰는 설정. 모든 파일 경로를 바꿔 실제 인덱스/캐시를 건드리지 않는다"""
+    settings = Settings()
+    db_dir = os.path.join(root, "db")
+    overrides = {
+        "DATA_DIR": os.path.join(root, "data"),
+        "DB_DIR": db_dir,
+        "EMBED_MODEL": "bench-fake-embedding",
+        "EMBED_CACHE_PATH": os.path.join(root, "embedding_cache.sqlite3"),
+        "PDF_CACHE_DIR": os.path.join(root, "pdf_cache"),
+        "BUILDER_LOCK_PATH": os.path.join(db_dir, ".builder.lock"),
+        "SUMMARY_PATH": os.path.join(db_dir, "summaries.json"),
+        "SUMMARY_ENABLED": False,
+        "SERVING_ROLE": "reader",  # 인덱스 구축은 벤치마크가 직접 호출해 시간을 잰다
+        "WORKERS": 1,  # 한 프로세스 안에서만 돈다 (환경의 WEB_CONCURRENCY와 무관하게 Chroma 사용 가능)
+        "DATA_WATCH_INTERVAL": 0,
+        "EMBED_RATE_PER_SEC": 1e9,
+        "EMBED_BURST": 1_000_000,
+        "VECTOR_BACKEND": backend,
+        # 가짜 임베딩은 유사도 분포가 Gemini와 달라 컷오프를 낮춘다
+        "SIMILARITY_THRESHOLD": 0.1,
+    }
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    return settings
+
+
+def _latency(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run(backend: str = "chroma", filler: int = 300, embed_latency: float = 0.0,
+        llm_latency: float = 0.0, repeat: int = 50) -> dict:
+    with tempfile.TemporaryDirectory() as root:
+        settings = _settings(root, backend)
+        _write_fixtures(settings.DATA_DIR, filler)
+        embeddings = FakeEmbeddings(latency=embed_latency)
+
+        def make_bot():
+            llm = FakeListChatModel(responses=["벤치마크 답변입니다."], sleep=llm_latency or None)
+            return Dask_AI(settings=settings, embeddings=embeddings, llm=llm)
+
+        # 1. 인덱스가 없는 상태의 시작 시간 -> 인덱스 구축 -> 인덱스가 있는 상태의 시작 시간
+        start = time.perf_counter()
+        bot = make_bot()
+        cold_start = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vector_db = bot.loader.get_vector_db(bot.embeddings)
+        build_seconds = time.perf_counter() - start
+        chunks = len((bot.loader.load_manifest() or {}).get("ids", []))
+        bot.set_vector_db(vector_db)
+
+        start = time.perf_counter()
+        bot = make_bot()
+        warm_start = time.perf_counter() - start
+
+        # 2. 급식/시간표 빠른 경로
+        fast = []
+        for _ in range(repeat):
+            for question in FAST_PATH_QUESTIONS:
+                t = time.perf_counter()
+                bot.ask(question)
+                fast.append(time.perf_counter() - t)
+
+        # 3. 검색 지연과 골든 질문 적중률 (임베딩 + 2단계 검색, LLM 제외)
+        retrieval, hits, reciprocal_ranks = [], 0, []
+        for question, marker in GOLDEN:
+            query = analyze(question)
+            for _ in range(repeat):
+                t = time.perf_counter()
+                results = bot._retrieve(query, bot.embeddings.embed_query(question))
+                retrieval.append(time.perf_counter() - t)
+            rank = next((i + 1 for i, (d, _) in enumerate(results[:settings.CONTEXT_DOCS]) if marker in d.page_content), None)
+            hits += rank is not None
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+        # 4. 가짜 LLM까지 포함한 RAG 전체 (답변 캐시는 매번 비움)
+        rag = []
+        for _ in range(max(1, repeat // 5)):
+            for question, _ in GOLDEN:
+                bot.answer_cache.invalidate()
+                t = time.perf_counter()
+                bot.ask(question)
+                rag.append(time.perf_counter() - t)
+
+        return {
+            "commit": _commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "config": {"backend": backend, "filler_posts": filler, "embed_latency_s": embed_latency,
+                       "llm_latency_s": llm_latency, "repeat": repeat},
+            "startup": {"cold_s": round(cold_start, 4), "warm_s": round(warm_start, 4)},
+            "index_build": {"chunks": chunks, "seconds": round(build_seconds, 4),
+                            "chunks_per_s": round(chunks / build_seconds, 1) if build_seconds else None},
+            "fast_path": _latency(fast),
+            "retrieval": dict(_latency(retrieval), hit_rate=round(hits / len(GOLDEN), 3),
+                              mrr=round(statistics.fmean(reciprocal_ranks), 3)),
+            "rag_ask": _latency(rag),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="D-ask AI 엔진 오프라인 벤치마크")
+    parser.add_argument("--out", help="결과 JSON 파일 경로 (없으면 표준 출력만)")
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "numpy"])
+    parser.add_argument("--filler", type=int, default=300, help="골든 공지 외에 섞을 공지 수")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="가짜 임베딩 호출당 지연 (초)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="가짜 LLM 응답 지연 (초)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    result = run(args.backend, args.filler, args.embed_latency, args.llm_latency, args.repeat)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
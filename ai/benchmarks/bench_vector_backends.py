@@ -0,0 +1,93 @@
+# 벡터 저장소 벤치마크: Chroma vs 메모리 매핑 NumPy (적재 시간 / 검색 지연 / 상주 메모리)
+# 실행: python -m ai.benchmarks.bench_vector_backends [조각 수] [차원]
+# 임베딩 API를 부르지 않도록 무작위 벡터를 미리 만들어 넣는다. 백엔드마다 새 프로세스로 실행해 RSS를 따로 잰다.
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BATCH = 500
+QUERIES = 200
+K = 15
+
+
+def _rss_mb() -> float:
+    """현재 프로세스의 상주 메모리 (리눅스 /proc 기준, 없으면 0)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _open(backend: str, path: str):
+    if backend == "numpy":
+        from ai.core.loaders import NumpyVectorStore
+        return NumpyVectorStore(os.path.join(path, "numpy_index"))
+    from langchain_chroma import Chroma
+    return Chroma(collection_name="bench", persist_directory=path)
+
+
+def _run(backend: str, n: int, dim: int, out):
+    from ai.core.loaders import _store_upsert
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    queries = rng.standard_normal((QUERIES, dim), dtype=np.float32)
+    with tempfile.TemporaryDirectory() as path:
+        store = _open(backend, path)
+        start = time.perf_counter()
+        for i in range(0, n, BATCH):
+            ids = [f"c{j}" for j in range(i, min(i + BATCH, n))]
+            _store_upsert(
+                store,
+                ids=ids,
+                embeddings=vectors[i:i + BATCH].tolist(),
+                documents=[f"조각 {j}" for j in range(i, i + len(ids))],
+                metadatas=[{"source": "bench"} for _ in ids],
+            )
+        build = time.perf_counter() - start
+
+        # 서빙 워커처럼 디스크에서 다시 열어 검색
+        del store
+        base_rss = _rss_mb()
+        store = _open(backend, path)
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            store.similarity_search_by_vector_with_relevance_scores(query.tolist(), k=K)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        out.put({
+            "backend": backend,
+            "build_s": build,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+            "rss_mb": _rss_mb() - base_rss,
+        })
+
+
+def bench(n: int = 20000, dim: int = 768):
+    print(f"조각 {n}개, {dim}차원, 검색 {QUERIES}회 (k={K})")
+    for backend in ("chroma", "numpy"):
+        out = multiprocessing.Queue()
+        proc = multiprocessing.Process(target=_run, args=(backend, n, dim, out))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            print(f"{backend:8s} 실행 실패 (exit {proc.exitcode})")
+            continue
+        r = out.get()
+        print(f"{r['backend']:8s} 적재 {r['build_s']:7.2f}s  p50 {r['p50_ms']:7.2f}ms  "
+              f"p95 {r['p95_ms']:7.2f}ms  검색 후 RSS 증가 {r['rss_mb']:7.1f}MB")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    bench(*args)
@@ -0,0 +1,348 @@
+# 답변 캐시 (정규화 질문 정확 일치 + 임베딩 유사도 일치) 및 임베딩 캐시
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_question(question: str) -> str:
+    """공백/대소문자/끝 문장부호 차이를 없애 같은 질문을 같은 키로 만든다."""
+    q = re.sub(r"\s+", " ", question.strip().lower())
+    return q.rstrip(" ?!.~")
+
+
+def answer_scope(query) -> str:
+    """분석기가 뽑은 슬롯으로 만든 답변 캐시 범위.
+
+    '1학년 1반 시간표'와 '1학년 2반 시간표'처럼 임베딩은 거의 같아도 답이 다른 질문이 있으므로,
+    범위(의도/날짜/학년·반/교시/선생님/끼니/질문 속 숫자)가 같은 항목끼리만 답을 나눠 쓴다.
+    """
+    date = query.date if query.date_explicit else None
+    return repr((
+        query.intent, date, query.date_range, query.grade, query.class_num,
+        query.period, query.teacher, query.meal_slot, tuple(re.findall(r"\d+", query.question)),
+    ))
+
+
+def unit_vector(vector: List[float]) -> Optional[np.ndarray]:
+    """L2 정규화한 float32 벡터. 내적이 곧 코사인 유사도가 된다 (길이 0이면 None)"""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    if not norm:
+        return None
+    return v / norm
+
+
+class AnswerCache:
+    """TTL + LRU 기반 답변 캐시. VectorDB가 다시 만들어지면 invalidate()로 비운다.
+
+    키는 (범위, 정규화 질문)이고, 임베딩 유사도 조회도 같은 범위(answer_scope) 안에서만 한다.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600, similarity: float = 0.95):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity
+        # (범위, 정규화 질문) -> (answer, 정규화 임베딩, 저장 시각)
+        self._entries = OrderedDict()
+        # 유사도 조회용으로 임베딩을 쌓은 행렬. 항목이 바뀌면 다음 조회 때 다시 만든다
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - stored_at > self.ttl
+
+    def _get_exact_locked(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        answer, _, stored_at = entry
+        if self._expired(stored_at, now):
+            del self._entries[key]
+            self._matrix = None
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return answer
+
+    def get_exact(self, question: str, scope: str = "") -> Optional[str]:
+        """임베딩 없이 정규화 키만으로 조회 (미스는 집계하지 않음)"""
+        with self._lock:
+            return self._get_exact_locked((scope, normalize_question(question)), time.time())
+
+    def _nearest_locked(self, query: np.ndarray, scope: str, now: float):
+        """만료 항목을 정리하고, 임베딩 행렬과 질문 벡터의 내적 한 번으로 같은 범위에서 가장 가까운 (키, 유사도)를 찾는다"""
+        expired = [k for k, (_, _, stored_at) in self._entries.items() if self._expired(stored_at, now)]
+        for k in expired:
+            del self._entries[k]
+        if expired:
+            self._matrix = None
+        if self._matrix is None:
+            self._matrix_keys = [
+                k for k, (_, emb, _) in self._entries.items() if emb is not None and emb.shape == query.shape
+            ]
+            vectors = [self._entries[k][1] for k in self._matrix_keys]
+            self._matrix = np.stack(vectors) if vectors else np.empty((0, query.shape[0]), dtype=np.float32)
+        if not self._matrix_keys:
+            return None, 0.0
+        scores = self._matrix @ query
+        scores[np.array([k[0] != scope for k in self._matrix_keys])] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return None, 0.0
+        return self._matrix_keys[best], float(scores[best])
+
+    def get(self, question: str, embedding: Optional[List[float]] = None, scope: str = "") -> Optional[str]:
+        key = (scope, normalize_question(question))
+        now = time.time()
+        query = unit_vector(embedding) if embedding is not None else None
+        with self._lock:
+            answer = self._get_exact_locked(key, now)
+            if answer is not None:
+                return answer
+
+            if query is not None:
+                best_key, best_score = self._nearest_locked(query, scope, now)
+                if best_key is not None and best_score >= self.similarity:
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return self._entries[best_key][0]
+
+            self.misses += 1
+            return None
+
+    def set(self, question: str, answer: str, embedding: Optional[List[float]] = None, scope: str = ""):
+        key = (scope, normalize_question(question))
+        vector = unit_vector(embedding) if embedding is not None else None
+        with self._lock:
+            self._entries[key] = (answer, vector, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.semantic_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.semantic_hits) / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 객체를 감싸 (모델명, 용도, 텍스트 해시) 단위로 결과를 디스크에 저장한다.
+
+    문서 임베딩은 SQLite 파일에, 질문 임베딩은 메모리 LRU와 SQLite 양쪽에 둔다.
+    파일 크기가 max_bytes를 넘으면 가장 오래 쓰이지 않은 항목부터 지운다.
+    """
+
+    def __init__(self, embeddings, model_name: str, path: str,
+                 max_bytes: int = 512 * 1024 * 1024, query_cache_size: int = 1024):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 여러 워커 프로세스가 같은 파일을 공유하므로 WAL + 잠금 대기 시간 설정
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON embeddings(accessed_at)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._total_bytes = row[0]
+
+    def _key(self, kind: str, text: str) -> str:
+        # Gemini는 질문/문서 임베딩의 task type이 달라 같은 텍스트라도 용도별로 따로 저장
+        raw = f"{self.model_name}\x00{kind}\x00{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    def _load(self, keys: List[str]) -> dict:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                found.update((k, self._unpack(v)) for k, v in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, items: List[tuple]):
+        now = time.time()
+        with self._lock:
+            for key, vector in items:
+                blob = self._pack(vector)
+                old = self._conn.execute("SELECT LENGTH(vector) FROM embeddings WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                    (key, blob, now),
+                )
+                self._total_bytes += len(blob) - (old[0] if old else 0)
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def lookup_documents(self, texts: List[str]) -> dict:
+        """API 호출 없이 캐시에 있는 문서 임베딩만 {인덱스: 벡터}로 반환"""
+        keys = [self._key("document", t) for t in texts]
+        found = self._load(list(set(keys)))
+        return {i: found[k] for i, k in enumerate(keys) if k in found}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", t) for t in texts]
+        found = self._load(list(set(keys)))
+        # 캐시에 없는 텍스트만, 중복 없이 한 번씩 API로 보냄
+        missing = {}
+        for i, k in enumerate(keys):
+            if k not in found:
+                missing.setdefault(k, texts[i])
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self._store(new_items)
+            found.update(new_items)
+        return [found[k] for k in keys]
+
+    def _remember_query(self, key: str, vector: List[float]):
+        with self._lock:
+            self._queries[key] = vector
+            self._queries.move_to_end(key)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+    def _cached_query(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                self.hits += 1
+                return vector
+        vector = self._load([key]).get(key)
+        if vector is not None:
+            self.hits += 1
+            self._remember_query(key, vector)
+        return vector
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = self._cached_query(key)
+        if vector is None:
+            self.misses += 1
+            vector = self.embeddings.embed_query(text)
+            self._remember_query(key, vector)
+            self._store([(key, vector)])
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # SQLite 조회/저장(잠금 대기 최대 timeout초)은 이벤트 루프를 막지 않도록 스레드에서
+        key = self._key("query", text)
+        vector = await asyncio.to_thread(self._cached_query, key)
+        if vector is None:
+            self.misses += 1
+            vector = await self.embeddings.aembed_query(text)
+            self._remember_query(key, vector)
+            await asyncio.to_thread(self._store, [(key, vector)])
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """여러 질문의 임베딩. 캐시에 없는 질문만 중복 없이 한 번의 API 호출로 보낸다"""
+        keys = [self._key("query", t) for t in texts]
+        found = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self._cached_query(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+        if missing:
+            self.misses += len(missing)
+            try:
+                # Gemini 임베딩은 task_type으로 질문용 임베딩을 배치로 만들 수 있다
+                vectors = self.embeddings.embed_documents(list(missing.values()), task_type="RETRIEVAL_QUERY")
+            except TypeError:
+                vectors = [self.embeddings.embed_query(t) for t in missing.values()]
+            new_items = list(zip(missing.keys(), vectors))
+            for key, vector in new_items:
+                self._remember_query(key, vector)
+            self._store(new_items)
+            found.update(new_items)
+        return [found[k] for k in keys]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "query_lru_size": len(self._queries),
+        }
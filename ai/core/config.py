@@ -21,4 +21,62 @@ class Settings:
     # 모델 설정
     EMBED_MODEL = "models/gemini-embedding-001"
     LLM_MODEL = "models/gemini-2.5-flash"
-    SIMILARITY_THRESHOLD = 0.1
+    # 벡터 후보의 최소 코사인 유사도 (이보다 낮으면 문맥에서 제외).
+    # 예전 값 0.1은 어디서도 읽히지 않았고, 코사인 0.1은 사실상 모든 후보를 통과시켜 컷오프 의미가 없다.
+    # 0.5는 보수적인 시작값이므로 /retrieval/stats의 top_similarity 분포를 보고 조정할 것
+    SIMILARITY_THRESHOLD = float(os.getenv("DASK_SIMILARITY_THRESHOLD", "0.5"))
+
+    # 답변 캐시 설정
+    ANSWER_CACHE_SIZE = 256
+    ANSWER_CACHE_TTL = 60 * 60  # 초
+    ANSWER_CACHE_SIMILARITY = 0.95
+
+    # 임베딩 스케줄러 설정 (텍스트 기준 초당 호출량)
+    EMBED_RATE_PER_SEC = 1.5
+    EMBED_BURST = 20
+    EMBED_MIN_BATCH = 5
+    EMBED_MAX_BATCH = 50
+    EMBED_CONCURRENCY = 2
+
+    # 임베딩 디스크 캐시 설정
+    EMBED_CACHE_PATH = os.path.join(AI_DIR, "embedding_cache.sqlite3")
+    EMBED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    QUERY_EMBED_CACHE_SIZE = 1024
+
+    # 벡터 저장소: chroma / numpy (메모리 매핑 행렬, DB_DIR/numpy_index)
+    VECTOR_BACKEND = os.getenv("DASK_VECTOR_BACKEND", "chroma")
+    NUMPY_INDEX_DTYPE = "float32"  # float16이면 파일/메모리가 절반
+
+    # 하이브리드 검색 설정 (벡터 + BM25)
+    VECTOR_K = 50
+    HYBRID_VECTOR_K = 15  # 질문 용어가 문서에 그대로 있을 때 줄여 쓰는 벡터 검색 수
+    LEXICAL_K = 20
+    EXACT_MATCH_COVERAGE = 0.8
+    RRF_K = 60
+    LEXICAL_MIN_COVERAGE = 0.5  # 어휘 후보의 최소 질문 용어 포함 비율
+    MMR_LAMBDA = 0.7  # 1이면 관련도만, 0이면 다양성만
+    CONTEXT_DOCS = 10
+    CONTEXT_TOKEN_BUDGET = 3000  # 문맥에 쓸 최대 토큰 (근사치, 300자 조각 10개가 들어가는 크기)
+
+    # 일괄 질문(/qna/batch) 설정
+    BATCH_MAX_QUESTIONS = 50
+    BATCH_LLM_CONCURRENCY = 4
+
+    # 문서 요약 설정 (들여올 때 한 번만 요약)
+    SUMMARY_ENABLED = True
+    SUMMARY_PATH = os.path.join(DB_DIR, "summaries.json")
+    SUMMARY_MAP_CHARS = 4000  # 이보다 긴 문서는 부분 요약 후 합침
+    SUMMARY_CONCURRENCY = 4
+
+    # PDF 파싱 설정
+    PDF_CACHE_DIR = os.path.join(AI_DIR, "pdf_cache")
+    PDF_WORKERS = None  # None이면 CPU 코어 수
+
+    # 크롤러 데이터 변경 감지 주기 (초, 0이면 끔)
+    DATA_WATCH_INTERVAL = 30
+
+    # 멀티 워커 서빙 역할: auto(파일 잠금으로 선출) / builder / reader
+    SERVING_ROLE = os.getenv("DASK_AI_ROLE", "auto")
+    # uvicorn 워커 수. 여러 프로세스가 같은 인덱스를 열 때는 numpy 백엔드가 필요 (로컬 Chroma는 단일 프로세스 전용)
+    WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+    BUILDER_LOCK_PATH = os.path.join(DB_DIR, ".builder.lock")
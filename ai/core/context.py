@@ -0,0 +1,108 @@
+# 문맥 패킹: 같은 출처/페이지의 겹치는 조각을 이어 붙이고 토큰 예산 안에서 관련도 순으로 채운다
+import re
+from typing import Dict, List, Optional, Tuple
+
+from langchain_community.docstore.document import Document
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+# 조각을 나눌 때 겹침이 50자이므로, 이보다 훨씬 짧은 우연한 일치로는 잇지 않는다
+MIN_OVERLAP = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Gemini 토큰 수 근사치. 한글은 글자당 약 1토큰, 그 밖의 문자는 4글자당 1토큰으로 본다"""
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def _overlap(left: str, right: str) -> int:
+    """left의 끝과 right의 앞이 겹치는 길이 (MIN_OVERLAP 미만이면 0)"""
+    for size in range(min(len(left), len(right)), MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_chunks(texts: List[str]) -> List[Tuple[str, List[int]]]:
+    """같은 페이지의 조각들을 겹침 기준으로 합친다.
+
+    (합친 텍스트, 포함된 입력 인덱스 목록)을 반환. 다른 조각에 통째로 들어 있는 조각은 버린다.
+    """
+    segments = [(text, [i]) for i, text in enumerate(texts)]
+    merged = True
+    while merged and len(segments) > 1:
+        merged = False
+        for a in range(len(segments)):
+            for b in range(len(segments)):
+                if a == b:
+                    continue
+                text_a, members_a = segments[a]
+                text_b, members_b = segments[b]
+                if text_b in text_a:
+                    combined = text_a
+                else:
+                    size = _overlap(text_a, text_b)
+                    if not size:
+                        continue
+                    combined = text_a + text_b[size:]
+                segments[a] = (combined, sorted(members_a + members_b))
+                del segments[b]
+                merged = True
+                break
+            if merged:
+                break
+    return segments
+
+
+def _group_key(doc: Document) -> Tuple[str, str]:
+    """조각을 합칠 단위. 공지는 모두 crawling.json 한 출처라 링크로, PDF는 페이지로 나눈다"""
+    source = str(doc.metadata.get("source"))
+    link = doc.metadata.get("link")
+    if link:
+        return source, str(link)
+    return source, str(doc.metadata.get("page", ""))
+
+
+def _header(key: Tuple[str, str], doc: Document) -> str:
+    link = doc.metadata.get("link")
+    return f"[출처: {key[0]} {link}] " if link else f"[출처: {key[0]}] "
+
+
+def pack_context(results: List[Tuple[Document, float]], max_docs: int, token_budget: int) -> Optional[str]:
+    """검색 결과(관련도 순)를 LLM 문맥 문자열로 만든다. 쓸 문서가 없으면 None.
+
+    같은 문서(공지는 링크, PDF는 페이지)의 조각은 겹침을 없애 하나로 잇고 출처 표시도 한 번만 붙인다.
+    합친 덩어리는 가장 관련도 높은 조각의 순위를 따르며, 예산을 넘기는 덩어리는 건너뛴다.
+    """
+    docs = [d for d, _ in results[:max_docs]]
+    if not docs:
+        return None
+
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for rank, doc in enumerate(docs):
+        groups.setdefault(_group_key(doc), []).append(rank)
+    headers = {key: _header(key, docs[ranks[0]]) for key, ranks in groups.items()}
+
+    segments = []  # (순위, 그룹 키, 텍스트)
+    for key, ranks in groups.items():
+        for text, members in merge_chunks([docs[r].page_content for r in ranks]):
+            segments.append((min(ranks[m] for m in members), key, text))
+    segments.sort()
+
+    chosen: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+    used = 0
+    for rank, key, text in segments:
+        cost = estimate_tokens(text) + (0 if key in chosen else estimate_tokens(headers[key]))
+        if used + cost > token_budget:
+            if chosen:
+                continue
+            # 가장 관련도 높은 덩어리 하나가 예산보다 크면 잘라서라도 넣는다
+            text = text[:max(1, len(text) * token_budget // max(cost, 1))]
+            cost = token_budget
+        chosen.setdefault(key, []).append((rank, text))
+        used += cost
+
+    # 출처 묶음은 그 안에서 가장 관련도 높은 덩어리의 순위대로 출력
+    ordered = sorted(chosen.items(), key=lambda item: min(rank for rank, _ in item[1]))
+    return "\n\n".join(headers[key] + "\n".join(text for _, text in parts) for key, parts in ordered)
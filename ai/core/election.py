@@ -0,0 +1,49 @@
+# 멀티 워커 서빙용 빌더 선출: 파일 잠금을 잡은 프로세스 하나만 인덱스를 쓴다
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경에서는 단일 프로세스로 보고 항상 빌더
+    fcntl = None
+
+
+class BuilderLock:
+    """DB_DIR 안의 잠금 파일에 대한 배타적 flock.
+
+    잠금은 프로세스가 살아 있는 동안 유지되고, 죽으면 OS가 풀어 주므로
+    다른 워커가 다음 시도에서 빌더를 이어받을 수 있다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None and self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
@@ -9,9 +9,10 @@ project_root = os.path.dirname(os.path.dirname(current_file_path))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-import json
-import re
-from typing import Dict, Any
+import asyncio
+import datetime
+import threading
+from typing import Dict, Any, AsyncIterator, List, Optional
 
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -20,13 +21,28 @@ from langchain_core.output_parsers import StrOutputParser
 
 # 만든 모듈들 임포트
 from ai.core.config import Settings
-from ai.core.loaders import DocumentLoader
-from ai.utils.parser import QuestionParser
-from ai.utils.date_helper import extract_date
+from ai.core.loaders import DocumentLoader, relevance_score
+from ai.core.meals import MealStore
+from ai.core.timetable import TimetableStore
+from ai.core.lexical import reciprocal_rank_fusion, term_coverage
+from ai.core.context import pack_context
+from ai.core.retrieval import RetrievalStats, mmr_select
+from ai.core.cache import AnswerCache, CachedEmbeddings, answer_scope, normalize_question
+from ai.core.watcher import DataWatcher, file_snapshot
+from ai.core.election import BuilderLock
+from ai.core.summaries import SummaryStore, Summarizer
+from ai.core.telemetry import CACHE_EVENTS, ERRORS, ROUTES, get_logger, timed
+from ai.utils.analyzer import ParsedQuery, analyze
+
+logger = get_logger("engine")
+
+RAG_TEMPLATE = "당신은 학교 도우미 D-ASK입니다. 아래 문맥을 사용하여 질문에 답하세요.\n\n문맥:\n{context}\n\n질문: {question}\n\n답변: 단, 마크 다운 문법을 사용하지말고 답변하세요. 또한, JSON에 pdf가 있을 경우 pdf 링크를 마지막에 출력해 주세요."
+NO_ANSWER_MESSAGE = "학교 관련 정보에서 답변을 찾을 수 없습니다."
 
 class Dask_AI:
-    def __init__(self):
-        self.settings = Settings()
+    def __init__(self, settings: Optional[Settings] = None, embeddings=None, llm=None):
+        """settings/embeddings/llm을 넘기면 그것을 쓴다 (벤치마크의 가짜 모델 주입용). 없으면 Gemini"""
+        self.settings = settings or Settings()
         
         # 유틸리티 및 로더 초기화
         self.loader = DocumentLoader(self.settings)
@@ -35,173 +51,637 @@ class Dask_AI:
         api_key = os.getenv("GOOGLE_API_KEY")
         
         # AI 모델 설정
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-                    model=self.settings.EMBED_MODEL,
-                    google_api_key=api_key
-                )
-        self.llm = ChatGoogleGenerativeAI(
+        # 같은 텍스트는 다시 API로 보내지 않도록 디스크 캐시로 감싼다
+        self.embeddings = CachedEmbeddings(
+            embeddings or GoogleGenerativeAIEmbeddings(
+                model=self.settings.EMBED_MODEL,
+                google_api_key=api_key
+            ),
+            model_name=self.settings.EMBED_MODEL,
+            path=self.settings.EMBED_CACHE_PATH,
+            max_bytes=self.settings.EMBED_CACHE_MAX_BYTES,
+            query_cache_size=self.settings.QUERY_EMBED_CACHE_SIZE,
+        )
+        self.llm = llm or ChatGoogleGenerativeAI(
             model=self.settings.LLM_MODEL,
             google_api_key=api_key,
             temperature=0.1,
             convert_system_message_to_human=True # LangChain 버전 이슈 방지용 추가
         )
+        self.chain = self._build_chain()
+        # 공지/PDF 요약은 들여올 때 한 번만 만들어 두고 읽을 때는 저장된 값만 돌려준다
+        self.summary_store = SummaryStore(self.settings.SUMMARY_PATH)
+        self.summary_store.load()
+        self.summarizer = Summarizer(
+            self.llm,
+            self.summary_store,
+            map_chars=self.settings.SUMMARY_MAP_CHARS,
+            max_concurrency=self.settings.SUMMARY_CONCURRENCY,
+        )
         
         # 데이터 캐시 및 VectorDB
-        self.meal_cache = {}
-        self.timetable_cache = {}
+        self.meal_store = MealStore([])
+        self.timetable_store = TimetableStore([])
         self.vector_db = None
+        self.index_status = "pending"  # pending / building / waiting / stale / ready / failed
+        self.answer_cache = AnswerCache(
+            max_size=self.settings.ANSWER_CACHE_SIZE,
+            ttl=self.settings.ANSWER_CACHE_TTL,
+            similarity=self.settings.ANSWER_CACHE_SIMILARITY,
+        )
+        self.retrieval_stats = RetrievalStats()
+        # 처리 중인 일반 질문 (정규화 질문 -> asyncio.Task), 중복 요청 합치기용
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # VectorDB 백그라운드 동기화는 한 번에 하나만
+        self._sync_lock = threading.Lock()
+        self._sync_running = False
+        self._sync_again = False
+        self.watcher = None
+        self.builder_lock = BuilderLock(self.settings.BUILDER_LOCK_PATH)
+        self.is_builder = False
         self._initialize()
 
     def _initialize(self):
-        """데이터 로드 및 시스템 준비"""
-        print("로그: Dask_AI 엔진 초기화 중...")
+        """데이터 로드 및 시스템 준비. 급식/시간표는 즉시, VectorDB 동기화는 필요할 때만 백그라운드로"""
+        logger.info("Dask_AI 엔진 초기화 중...")
+        self._check_serving_backend()
         self._load_meal_data()
         self._load_timetable_data()
-        # loaders.py의 기능을 사용하여 DB 설정
-        self.vector_db = self.loader.get_vector_db(self.embeddings)
-        print("로그: 엔진 준비 완료.")
 
-    def _load_meal_data(self):
-        """급식 JSON 파싱 및 캐싱"""
+        # 여러 워커 중 잠금을 잡은 하나만 인덱스를 만들고, 나머지는 만들어진 인덱스를 읽기만 한다
+        role = self.settings.SERVING_ROLE
+        self.is_builder = role != "reader" and (self.builder_lock.try_acquire() or role == "builder")
+
+        # 원본을 다시 파싱하지 않고 매니페스트로 기존 VectorDB 검증
+        vector_db, up_to_date = self.loader.open_existing(self.embeddings)
+        if vector_db is not None:
+            self.set_vector_db(vector_db)
+        if up_to_date:
+            self.index_status = "ready"
+            # 인덱스는 최신이지만 요약이 원본보다 오래됐으면 동기화 한 번으로 요약만 채운다 (임베딩 호출 없음)
+            if self.is_builder and self.settings.SUMMARY_ENABLED \
+                    and self.summary_store.sources != self.loader.source_fingerprint():
+                self._request_vector_sync()
+        elif not self.is_builder:
+            self.index_status = "stale" if vector_db is not None else "waiting"
+        else:
+            self.index_status = "stale" if vector_db is not None else "building"
+            self._request_vector_sync()
+        self._start_watcher()
+        logger.info(f"엔진 준비 완료. (역할: {self.role}, VectorDB: {self.index_status})")
+
+    def _check_serving_backend(self):
+        """로컬 Chroma(PersistentClient)는 경로별로 클라이언트를 캐시하고 여러 프로세스의 동시 접근을 지원하지 않아,
+        읽기 워커가 빌더의 갱신을 보지 못한 채 예전 벡터로 답할 수 있다. 멀티 워커에서는 numpy 백엔드만 허용"""
+        if self.settings.WORKERS > 1 and self.loader.backend != "numpy":
+            raise RuntimeError(
+                f"WEB_CONCURRENCY={self.settings.WORKERS}: "
+                "여러 워커가 인덱스를 공유하려면 DASK_VECTOR_BACKEND=numpy로 실행해야 합니다. "
+                "로컬 Chroma 백엔드는 워커 1개로만 실행할 수 있습니다."
+            )
+
+    @property
+    def role(self) -> str:
+        return "builder" if self.is_builder else "reader"
+
+    def _start_watcher(self):
+        """크롤러가 공유 볼륨의 데이터를 바꾸면 해당 저장소/인덱스만 다시 만든다"""
+        data_dir = self.settings.DATA_DIR
+        self.watcher = DataWatcher(interval=self.settings.DATA_WATCH_INTERVAL)
+        self.watcher.watch(
+            "school_meal.json",
+            lambda: file_snapshot(os.path.join(data_dir, "school_meal.json")),
+            self._load_meal_data,
+        )
+        self.watcher.watch(
+            "comcigan.json",
+            lambda: file_snapshot(os.path.join(data_dir, "comcigan.json")),
+            self._load_timetable_data,
+        )
+        if self.is_builder:
+            self.watcher.watch("crawling.json / PDF", self.loader.source_fingerprint, self._request_vector_sync)
+        else:
+            # 읽기 전용 워커는 빌더가 매니페스트를 갱신할 때마다 인덱스를 다시 연다
+            self.watcher.watch(
+                "index_manifest.json",
+                lambda: file_snapshot(self.loader._manifest_path()),
+                self._reload_shared_index,
+            )
+            self.watcher.watch(
+                "summaries.json",
+                lambda: file_snapshot(self.settings.SUMMARY_PATH),
+                self.summary_store.load,
+            )
+            if self.settings.SERVING_ROLE == "auto":
+                self.watcher.every(self._try_promote)
+        self.watcher.start()
+
+    def _reload_shared_index(self) -> bool:
+        """빌더가 만든 VectorDB/어휘 인덱스를 다시 열어 교체 (읽기 전용 워커)"""
+        vector_db, up_to_date = self.loader.open_existing(self.embeddings)
+        if vector_db is None:
+            return False
+        self.loader.reload_lexical_index()
+        self.set_vector_db(vector_db)
+        self.index_status = "ready" if up_to_date else "stale"
+        return True
+
+    def _try_promote(self):
+        """빌더 프로세스가 죽어 잠금이 풀렸으면 이 워커가 빌더를 이어받는다"""
+        if self.is_builder or not self.builder_lock.try_acquire():
+            return
+        logger.info("빌더 잠금 획득. 이 워커가 인덱스 빌더 역할을 맡습니다.")
+        self.is_builder = True
+        self.watcher.watch("crawling.json / PDF", self.loader.source_fingerprint, self._request_vector_sync)
+        self._request_vector_sync()
+
+    def _request_vector_sync(self) -> bool:
+        """VectorDB 동기화를 백그라운드로 요청. 이미 돌고 있으면 끝난 뒤 한 번 더 돌도록 표시"""
+        with self._sync_lock:
+            if self._sync_running:
+                self._sync_again = True
+                return True
+            self._sync_running = True
+        threading.Thread(target=self._sync_vector_db, name="vector-db-sync", daemon=True).start()
+        return True
+
+    def _sync_vector_db(self):
+        """백그라운드에서 원본과 VectorDB를 동기화한 뒤 교체"""
+        while True:
+            sources = self.loader.source_fingerprint()
+            try:
+                vector_db = self.loader.get_vector_db(self.embeddings)
+            except Exception as e:
+                logger.warning(f"VectorDB 백그라운드 동기화 실패: {e}")
+                vector_db = None
+            self._sync_summaries(sources)
+            if vector_db is not None:
+                self.set_vector_db(vector_db)
+                self.index_status = "ready"
+            elif self.vector_db is None:
+                self.index_status = "failed"
+            logger.info(f"VectorDB 백그라운드 동기화 종료. (상태: {self.index_status})")
+            with self._sync_lock:
+                if not self._sync_again:
+                    self._sync_running = False
+                    return
+                self._sync_again = False
+
+    def _sync_summaries(self, sources: dict):
+        """방금 들여온 문서 중 내용이 바뀐 것만 요약 (실패해도 인덱스 동기화에는 영향 없음)"""
+        if not self.settings.SUMMARY_ENABLED or not self.loader.summary_sources:
+            return
+        try:
+            self.summarizer.sync(self.loader.summary_sources, sources)
+        except Exception as e:
+            logger.warning(f"문서 요약 실패: {e}")
+
+    def status(self) -> dict:
+        """현재 응답 가능한 기능 목록 (/ready 용)"""
+        return {
+            "meal": bool(self.meal_store),
+            "timetable": bool(self.timetable_store),
+            "rag": self.vector_db is not None,
+            "index": self.index_status,
+            "role": self.role,
+        }
+
+    def set_vector_db(self, vector_db):
+        """VectorDB 교체 시 이전 인덱스 기준으로 만든 답변 캐시를 비움"""
+        self.vector_db = vector_db
+        self.answer_cache.invalidate()
+
+    def _load_meal_data(self) -> bool:
+        """급식 JSON을 구조화된 MealStore로 로드. 다 만든 뒤 한 번에 교체하므로 요청 중에도 안전"""
         path = os.path.join(self.settings.DATA_DIR, "school_meal.json")
-        if not os.path.exists(path): return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                for item in data:
-                    raw_date = str(item.get("날짜", "")).replace("-", "").strip()
-                    if len(raw_date) == 8:
-                        date_key = f"{raw_date[:4]}-{raw_date[4:6]}-{raw_date[6:]}"
-                        time_key = item.get("시간", "")
-                        menu = ", ".join(item.get("요리명", []))
-                        if date_key not in self.meal_cache: self.meal_cache[date_key] = {}
-                        self.meal_cache[date_key][time_key] = f"[{time_key}] {menu}"
+            self.meal_store = MealStore.from_json(path)
+            return True
         except Exception as e:
-            print(f"급식 데이터 로드 실패: {e}")
+            logger.warning(f"급식 데이터 로드 실패: {e}")
+            return False
 
-    def _load_timetable_data(self):
-        """시간표 JSON 파싱 - '원래 과목' 계층까지 완벽하게 파싱"""
+    def _load_timetable_data(self) -> bool:
+        """시간표 JSON을 교시 단위 기록(TimetableStore)으로 로드 - '원래 과목'은 별도 필드로 보관"""
         path = os.path.join(self.settings.DATA_DIR, "comcigan.json")
-        if not os.path.exists(path): return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                for item in data:
-                    for grade, classes in item.items():
-                        for class_name, dates in classes.items():
-                            # "1학년", "1반"에서 숫자만 추출
-                            g_num = re.search(r"\d+", grade)
-                            c_num = re.search(r"\d+", class_name)
-                            if not (g_num and c_num): continue
-                            
-                            class_key = f"{g_num.group()}-{c_num.group()}"
-                            if class_key not in self.timetable_cache: 
-                                self.timetable_cache[class_key] = {}
-                                
-                            for r_date, periods in dates.items():
-                                # "20260223-월요일" 에서 8자리 날짜만 추출
-                                d_match = re.search(r"(\d{8})", r_date)
-                                if not d_match: continue
-                                d8 = d_match.group(1)
-                                d_key = f"{d8[:4]}-{d8[4:6]}-{d8[6:]}" # 2026-02-23 형태
-                                
-                                lines = []
-                                for p_name, info in periods.items():
-                                    # 일반 과목 확인
-                                    subj = info.get("과목")
-                                    teacher = info.get("선생님")
-                                    
-                                    # 만약 비어있다면 '원래 과목' 안에서 찾기
-                                    if not subj and "원래 과목" in info:
-                                        orig = info["원래 과목"].get(p_name, {})
-                                        subj = orig.get("과목")
-                                        teacher = orig.get("선생님")
-                                    
-                                    if subj:
-                                        lines.append(f"{p_name}: {subj} ({teacher})")
-                                
-                                if lines:
-                                    self.timetable_cache[class_key][d_key] = "\n".join(lines)
-            print("로그: 시간표 데이터 캐싱 완료.")
+            self.timetable_store = TimetableStore.from_json(path)
+            logger.info("시간표 데이터 캐싱 완료.")
+            return True
         except Exception as e:
-            print(f"시간표 데이터 로드 실패: {e}")
+            logger.warning(f"시간표 데이터 로드 실패: {e}")
+            return False
 
     def ask(self, question: str) -> str:
-        q_type = QuestionParser.get_query_type(question)
-        date = extract_date(question)
+        with timed("total"):
+            query = self._analyze(question)
+            answer = self._fast_path_timed(query)
+            if answer is not None:
+                return answer
+            return self._run_rag(query)
+
+    def _analyze(self, question: str) -> ParsedQuery:
+        with timed("analyze"):
+            return analyze(question)
+
+    def _fast_path_timed(self, query: ParsedQuery) -> Optional[str]:
+        """급식/시간표 빠른 경로. 답했으면 라우팅 카운터를 올린다"""
+        with timed("fast_path"):
+            answer = self._answer_fast_path(query)
+        if answer is not None:
+            ROUTES.labels(intent=query.intent, route="fast_path").inc()
+        return answer
+
+    def _cached_answer(self, query: ParsedQuery, query_vector=None) -> Optional[str]:
+        """답변 캐시 조회. query_vector가 없으면 정확 일치만, 있으면 임베딩 유사도로 조회"""
+        with timed("cache_lookup"):
+            if query_vector is None:
+                cached = self.answer_cache.get_exact(query.question, scope=answer_scope(query))
+                kind = "exact"
+            else:
+                cached = self.answer_cache.get(query.question, embedding=query_vector, scope=answer_scope(query))
+                kind = "semantic"
+        CACHE_EVENTS.labels(cache="answer", result=f"{kind}_{'hit' if cached is not None else 'miss'}").inc()
+        if cached is not None:
+            ROUTES.labels(intent=query.intent, route="cache").inc()
+        return cached
+
+    def _no_answer(self, query: ParsedQuery) -> str:
+        ROUTES.labels(intent=query.intent, route="no_answer").inc()
+        return NO_ANSWER_MESSAGE
+
+    async def ask_async(self, question: str) -> str:
+        """ask의 비동기 버전. 이벤트 루프를 막지 않고, 동시에 들어온 같은 질문은 한 번만 처리"""
+        with timed("total"):
+            query = self._analyze(question)
+            answer = self._fast_path_timed(query)
+            if answer is not None:
+                return answer
+
+            key = normalize_question(question)
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._run_rag_async(query))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            else:
+                ROUTES.labels(intent=query.intent, route="coalesced").inc()
+            # 한 요청이 취소되어도 같은 질문을 기다리는 다른 요청에는 영향이 없도록 shield
+            return await asyncio.shield(task)
+
+    async def ask_batch(self, questions: List[str]) -> List[str]:
+        """여러 질문을 한 번에 처리해 입력 순서대로 답변 목록을 돌려준다.
+
+        급식/시간표/캐시로 답할 수 있는 질문은 바로 답하고, 나머지만 모아
+        질문 임베딩 한 번, 검색 병렬 실행, LLM 배치 호출(동시 실행 수 제한)로 처리한다.
+        """
+        answers: List[Optional[str]] = [None] * len(questions)
+        pending: Dict[str, List[int]] = {}  # 정규화한 질문 -> 같은 질문의 입력 위치들
+        queries: Dict[str, ParsedQuery] = {}
+        for i, question in enumerate(questions):
+            if not question:
+                answers[i] = "질문을 입력해 주세요."
+                continue
+            query = self._analyze(question)
+            answer = self._fast_path_timed(query)
+            if answer is not None:
+                answers[i] = answer
+                continue
+            key = normalize_question(question)
+            pending.setdefault(key, []).append(i)
+            queries.setdefault(key, query)
+
+        def fill(key: str, answer: str):
+            for i in pending[key]:
+                answers[i] = answer
+
+        if pending and not self.vector_db:
+            for key in pending:
+                fill(key, "데이터베이스가 준비되지 않았습니다.")
+            pending = {}
+
+        # 1. 정확 일치 캐시
+        for key in list(pending):
+            cached = self._cached_answer(queries[key])
+            if cached is not None:
+                fill(key, cached)
+                del pending[key]
+        if not pending:
+            return answers
+
+        # 2. 남은 질문의 임베딩을 한 번에 만들고 유사 질문 캐시 확인
+        keys = list(pending)
+        with timed("embed_query_batch"):
+            vectors = await asyncio.to_thread(self.embeddings.embed_queries, [queries[k].question for k in keys])
+        cached_answers = await asyncio.to_thread(
+            lambda: [self._cached_answer(queries[k], v) for k, v in zip(keys, vectors)]
+        )
+        rag_keys, rag_vectors = [], []
+        for key, vector, cached in zip(keys, vectors, cached_answers):
+            if cached is not None:
+                fill(key, cached)
+            else:
+                rag_keys.append(key)
+                rag_vectors.append(vector)
+
+        # 3. 검색은 스레드에서 병렬로
+        with timed("retrieve_batch"):
+            results = await asyncio.gather(*(
+                asyncio.to_thread(self._retrieve, queries[k], v) for k, v in zip(rag_keys, rag_vectors)
+            ))
+        inputs, llm_keys, llm_vectors = [], [], []
+        for key, vector, result in zip(rag_keys, rag_vectors, results):
+            context = self._build_context(queries[key].question, result)
+            if context is None:
+                fill(key, self._no_answer(queries[key]))
+                continue
+            inputs.append({"context": context, "question": queries[key].question})
+            llm_keys.append(key)
+            llm_vectors.append(vector)
+
+        # 4. LLM 배치 호출. 한 질문이 실패해도 나머지 답변은 돌려준다
+        with timed("llm_batch"):
+            outputs = await self.chain.abatch(
+                inputs,
+                config={"max_concurrency": self.settings.BATCH_LLM_CONCURRENCY},
+                return_exceptions=True,
+            ) if inputs else []
+        for key, vector, output in zip(llm_keys, llm_vectors, outputs):
+            if isinstance(output, Exception):
+                ERRORS.labels(stage="llm_batch").inc()
+                fill(key, f"서버 오류가 발생했습니다: {str(output)}")
+                continue
+            ROUTES.labels(intent=queries[key].intent, route="rag").inc()
+            self.answer_cache.set(queries[key].question, output, embedding=vector, scope=answer_scope(queries[key]))
+            fill(key, output)
+        return answers
+
+    def _answer_fast_path(self, query: ParsedQuery) -> Optional[str]:
+        """급식/시간표처럼 메모리 캐시로 바로 답할 수 있는 질문 처리. 일반 질문이면 None"""
+        date = query.date
+        # 핫 리로드로 저장소가 통째로 교체될 수 있으므로 요청마다 한 번만 참조
+        meal_store = self.meal_store
 
-        # 급식 질문 처리 (필터링 로직 추가)
-        if q_type == "meal":
-            meals = self.meal_cache.get(date, {})
+        # 메뉴가 언제 나오는지 묻는 질문은 날짜 조회보다 먼저 메뉴 역색인으로 답함
+        # (예: 급식에 치킨 언제 나와? / 다음에 치킨 언제 나와?)
+        # 급식 단어가 없는 일반 질문은 남은 낱말이 모두 메뉴일 때만 (예: '떡볶이 대회 언제야'는 RAG로)
+        if "when" in query.flags and query.intent in ("meal", "general"):
+            dishes = meal_store.match_dish(query.question, require_all=query.intent == "general")
+            if dishes:
+                hits = meal_store.dish_dates(dishes, after=datetime.date.today().strftime("%Y-%m-%d"))
+                if not hits:
+                    return f"앞으로 예정된 급식 중 {', '.join(dishes[:3])} 메뉴가 없습니다."
+                return "다가오는 급식 일정 \n" + "\n".join(f"{d} [{slot}] {dish}" for d, slot, dish in hits[:5])
+
+        # 급식 질문 처리 (끼니 필터링은 분석기가 뽑은 meal_slot 사용)
+        if query.intent == "meal":
+            with_allergies = "allergy" in query.flags
+
+            # 이번주/다음주처럼 기간을 물으면 날짜 정렬 배열에서 구간을 잘라 답함
+            if query.date_range and not query.meal_slot:
+                start, end = query.date_range
+                records = meal_store.between(start, end)
+                if not records: return f"{start} ~ {end} 급식 정보가 없습니다."
+                lines = [f"{r.date} {r.format(with_allergies)}" for r in records]
+                return f"{start} ~ {end} 급식 정보 \n" + "\n".join(lines)
+
+            meals = meal_store.get(date)
             if not meals: return f"{date} 급식 정보가 없습니다."
             
-            # 키워드 필터링
-            target_time = None
-            if any(k in question for k in ["아침", "조식"]): target_time = "조식"
-            elif any(k in question for k in ["점심", "중식"]): target_time = "중식"
-            elif any(k in question for k in ["저녁", "석식"]): target_time = "석식"
-            
+            target_time = query.meal_slot
             if target_time and target_time in meals:
-                return f"### {date} {target_time} 정보 ###\n{meals[target_time]}"
+                return f"### {date} {target_time} 정보 ###\n{meals[target_time].format(with_allergies)}"
             
             # 특정 끼니 언급 없으면 전체 출력
-            return f"{date} 급식 정보 \n" + "\n".join(meals.values())
+            return f"{date} 급식 정보 \n" + "\n".join(m.format(with_allergies) for m in meals.values())
 
-        # 2. 시간표 질문 처리 (에러 방지 및 로직 개선)
-        if q_type == "timetable":
-            g, c = QuestionParser.extract_grade_class(question)
-            if not g or not c: return "학년과 반 정보를 알려주세요. (예: 1학년 1반)"
-            
-            res = self.timetable_cache.get(f"{g}-{c}", {}).get(date)
-            # 데이터가 비어있는지(교시 내용이 없는지) 체크
-            if res and "(" in res and res.count("()") < 3: # 내용이 어느정도 있는 경우
-                 return f"{g}-{c} 시간표 ({date}) \n{res}"
-            else:
-                 return f"{g}학년 {c}반의 {date} 시간표 정보를 찾을 수 없거나 아직 업데이트되지 않았습니다."
+        # 2. 시간표 질문 처리 (교시/선생님/과목/주 단위 모두 메모리 색인으로 처리)
+        if query.intent == "timetable":
+            return self._answer_timetable(query)
 
-        return self._run_rag(question)
+        # 선생님 이름은 시간표 데이터에 있는 선생님일 때만 시간표로 답하고, 아니면 RAG로 넘긴다
+        # (예: '기숙사 사감 선생님 연락처')
+        if query.teacher and query.intent == "general":
+            teachers = self.timetable_store.match_teacher(query.teacher)
+            if teachers:
+                return self._answer_teacher(query, teachers)
 
-    def _run_rag(self, question: str) -> str:
-        if not self.vector_db: return "데이터베이스가 준비되지 않았습니다."
-        
-        # 1. PDF 우선 탐색 키워드 정의
-        pdf_keywords = ["인증제", "dsm", "기숙사", "우정관", "벌점", "상점", "규정"]
-        is_pdf_priority = any(kw in question.lower() for kw in pdf_keywords)
-        
-        # 2. 검색 범위 확장 (k=50)
-        results = self.vector_db.similarity_search_with_score(question, k=50)
-        if not results:
-            return "학교 관련 정보에서 답변을 찾을 수 없습니다."
-
-        pdf_docs = []
-        crawling_docs = []
-        for doc, score in results:
-            source = str(doc.metadata.get('source', '')).lower()
-            if source.endswith('.pdf'):
-                pdf_docs.append(doc)
-            else:
-                crawling_docs.append(doc)
+        return None
 
-        # 3. [핵심 로직] 키워드가 포함되어 있다면 PDF를 무조건 맨 앞으로!
-        if is_pdf_priority:
-            print(f"💡 키워드 감지됨! PDF 우선 모드로 동작합니다. (PDF 조각 {len(pdf_docs)}개)")
-            final_docs = pdf_docs + crawling_docs
-        else:
-            final_docs = [d for d, _ in results]
+    def _timetable_range(self, query: ParsedQuery):
+        if query.date_range:
+            return query.date_range
+        if query.date_explicit:
+            return query.date, query.date
+        return datetime.date.today().strftime("%Y-%m-%d"), "9999-12-31"
 
-        if not final_docs:
-            return "학교 관련 정보에서 답변을 찾을 수 없습니다."
+    def _answer_teacher(self, query: ParsedQuery, teachers: List[str]) -> str:
+        """선생님 수업 조회 (예: 김OO 선생님 수업 언제야)"""
+        g, c = query.grade, query.class_num
+        start, end = self._timetable_range(query)
+        slots = [s for s in self.timetable_store.teacher_slots(teachers, start, end) if not g or (s.grade, s.class_num) == (g, c)]
+        if not slots: return f"{query.teacher} 선생님의 해당 기간 수업이 없습니다."
+        lines = [f"{s.date}({s.weekday}) {s.period}교시 {s.grade}-{s.class_num} {s.subject}" for s in slots[:20]]
+        return f"{query.teacher} 선생님 수업 \n" + "\n".join(lines)
 
-        # 4. LLM에게 전달할 문맥 생성 (최대 10개)
-        context = "\n\n".join([f"[출처: {d.metadata.get('source')}] {d.page_content}" for d in final_docs[:10]])
-        
-        # 5. LLM 지시사항 강화
-        template = template = "당신은 학교 도우미 D-ASK입니다. 아래 문맥을 사용하여 질문에 답하세요.\n\n문맥:\n{context}\n\n질문: {question}\n\n답변: 단, 마크 다운 문법을 사용하지말고 답변하세요. 또한, JSON에 pdf가 있을 경우 pdf 링크를 마지막에 출력해 주세요."
-        
-        prompt = PromptTemplate.from_template(template)
-        chain = prompt | self.llm | StrOutputParser()
-        
-        return chain.invoke({"context": context, "question": question})
+    def _answer_timetable(self, query: ParsedQuery) -> Optional[str]:
+        store = self.timetable_store
+        date = query.date
+        g, c = query.grade, query.class_num
+        start, end = self._timetable_range(query)
+
+        # 선생님 수업 조회 (예: 김OO 선생님 수업 언제야). 시간표에 없는 선생님이고 반 정보도 없으면 RAG로
+        if query.teacher:
+            teachers = store.match_teacher(query.teacher)
+            if teachers:
+                return self._answer_teacher(query, teachers)
+            if not g or not c:
+                return None
+
+        if not g or not c: return "학년과 반 정보를 알려주세요. (예: 1학년 1반)"
+
+        # 과목이 언제 있는지 (예: 1학년 1반 수학 언제 있어?)
+        if "when" in query.flags:
+            subjects = store.match_subject(query.question)
+            if subjects:
+                slots = store.subject_slots(subjects, g, c, start, end)
+                if not slots: return f"{g}학년 {c}반의 해당 기간 {', '.join(subjects)} 수업이 없습니다."
+                lines = [f"{s.date}({s.weekday}) {s.period}교시 {s.subject} ({s.teacher or ''})" for s in slots[:20]]
+                return f"{g}-{c} {', '.join(subjects)} 수업 \n" + "\n".join(lines)
+
+        # 주 단위 시간표
+        if query.date_range:
+            days = store.between(g, c, start, end)
+            blocks = [f"[{d}]\n" + "\n".join(s.format() for s in slots) for d, slots in days.items() if slots]
+            if not blocks: return f"{g}학년 {c}반의 {start} ~ {end} 시간표 정보를 찾을 수 없습니다."
+            return f"{g}-{c} 시간표 ({start} ~ {end}) \n" + "\n".join(blocks)
+
+        slots = store.day(g, c, date)
+        # 데이터가 비어있는지(선생님 정보가 빠진 교시가 많은지) 체크
+        if not slots or sum(1 for s in slots if not s.teacher) >= 3:
+            return f"{g}학년 {c}반의 {date} 시간표 정보를 찾을 수 없거나 아직 업데이트되지 않았습니다."
+
+        # 특정 교시 질문 (예: 3교시 뭐야)
+        if query.period:
+            for s in slots:
+                if s.period == query.period:
+                    return f"{g}-{c} {date} {s.format()}"
+            return f"{g}학년 {c}반의 {date} {query.period}교시 수업이 없습니다."
+        return f"{g}-{c} 시간표 ({date}) \n" + "\n".join(s.format() for s in slots)
+
+    def _run_rag(self, query: ParsedQuery) -> str:
+        question = query.question
+        if not self.vector_db:
+            ROUTES.labels(intent=query.intent, route="not_ready").inc()
+            return "데이터베이스가 준비되지 않았습니다."
+
+        # 0. 답변 캐시 확인 (정확 일치 -> 임베딩 유사도 순)
+        cached = self._cached_answer(query)
+        if cached is not None:
+            return cached
+        with timed("embed_query"):
+            query_vector = self.embeddings.embed_query(question)
+        cached = self._cached_answer(query, query_vector)
+        if cached is not None:
+            return cached
+
+        with timed("retrieve"):
+            results = self._retrieve(query, query_vector)
+        with timed("build_context"):
+            context = self._build_context(question, results)
+        if context is None:
+            return self._no_answer(query)
+
+        with timed("llm"):
+            answer = self.chain.invoke({"context": context, "question": question})
+        ROUTES.labels(intent=query.intent, route="rag").inc()
+        self.answer_cache.set(question, answer, embedding=query_vector, scope=answer_scope(query))
+        return answer
+
+    async def _run_rag_async(self, query: ParsedQuery) -> str:
+        """_run_rag와 같은 흐름. 임베딩/LLM은 비동기 호출, Chroma 검색은 스레드에서 실행"""
+        question = query.question
+        answer, query_vector, context = await self._prepare_rag_async(query)
+        if answer is not None:
+            return answer
+
+        with timed("llm"):
+            answer = await self.chain.ainvoke({"context": context, "question": question})
+        ROUTES.labels(intent=query.intent, route="rag").inc()
+        self.answer_cache.set(question, answer, embedding=query_vector, scope=answer_scope(query))
+        return answer
+
+    async def ask_stream(self, question: str) -> AsyncIterator[str]:
+        """답변을 토큰 단위로 내보내는 스트리밍 버전. 급식/시간표/캐시 답변은 한 번에 내보냄"""
+        query = self._analyze(question)
+        answer = self._fast_path_timed(query)
+        if answer is None:
+            answer, query_vector, context = await self._prepare_rag_async(query)
+        if answer is not None:
+            yield answer
+            return
+
+        parts = []
+        with timed("llm_stream"):
+            async for chunk in self.chain.astream({"context": context, "question": question}):
+                parts.append(chunk)
+                yield chunk
+        ROUTES.labels(intent=query.intent, route="rag").inc()
+        self.answer_cache.set(question, "".join(parts), embedding=query_vector, scope=answer_scope(query))
+
+    async def _prepare_rag_async(self, query: ParsedQuery):
+        """LLM 호출 직전까지의 준비. (바로 돌려줄 답변, 질문 임베딩, 문맥) 반환"""
+        question = query.question
+        if not self.vector_db:
+            ROUTES.labels(intent=query.intent, route="not_ready").inc()
+            return "데이터베이스가 준비되지 않았습니다.", None, None
+
+        cached = self._cached_answer(query)
+        if cached is not None:
+            return cached, None, None
+        with timed("embed_query"):
+            query_vector = await self.embeddings.aembed_query(question)
+        # 유사도 캐시 조회는 캐시 전체 임베딩과의 행렬 곱이라 스레드에서 실행
+        cached = await asyncio.to_thread(self._cached_answer, query, query_vector)
+        if cached is not None:
+            return cached, query_vector, None
+
+        with timed("retrieve"):
+            results = await asyncio.to_thread(self._retrieve, query, query_vector)
+        with timed("build_context"):
+            context = self._build_context(question, results)
+        if context is None:
+            return self._no_answer(query), query_vector, None
+        return None, query_vector, context
+
+    def _retrieve(self, query: ParsedQuery, query_vector):
+        """2단계 검색: 벡터/BM25 후보 -> 점수 컷오프 -> RRF 융합 -> MMR 다양화.
+
+        살아남은 후보가 없으면 빈 목록을 돌려주고, 호출 측은 LLM 없이 '답변 없음'으로 끝낸다.
+        """
+        question = query.question
+        # 질문 원문은 기록하지 않는다 (/retrieval/stats는 인증 없이 열려 있어 다른 학생의 질문이 노출됨)
+        stats = {"intent": query.intent}
+        lexical = self.loader.lexical_index.search(question, k=self.settings.LEXICAL_K)
+
+        # 1. 질문 용어가 문서에 그대로 있으면(조항 번호 등) 벡터 검색 범위를 줄인다
+        coverage = [term_coverage(question, d) for d, _ in lexical]
+        exact = bool(coverage) and coverage[0] >= self.settings.EXACT_MATCH_COVERAGE
+        vector_k = self.settings.HYBRID_VECTOR_K if exact else self.settings.VECTOR_K
+
+        # 2. 캐시용으로 만든 질문 임베딩을 재사용해 벡터 검색
+        vector = self.vector_db.similarity_search_by_vector_with_relevance_scores(query_vector, k=vector_k)
+        stats["vector_candidates"] = len(vector)
+        stats["lexical_candidates"] = len(lexical)
+        stats["top_similarity"] = round(relevance_score(self.vector_db, vector[0][1]), 4) if vector else None
+
+        # 3. 컷오프: 유사도가 낮은 벡터 후보, 질문 용어가 거의 없는 어휘 후보를 버린다
+        vector = [(d, score) for d, score in vector
+                  if relevance_score(self.vector_db, score) >= self.settings.SIMILARITY_THRESHOLD]
+        lexical = [item for item, cov in zip(lexical, coverage) if cov >= self.settings.LEXICAL_MIN_COVERAGE]
+        stats["cut_by_score"] = stats["vector_candidates"] - len(vector)
+        stats["cut_by_coverage"] = stats["lexical_candidates"] - len(lexical)
+
+        results = []
+        if vector or lexical:
+            rankings = [vector, lexical]
+            # 규정/기숙사 등 PDF 힌트가 있으면 PDF 조각만 모은 순위를 한 번 더 넣어 가중
+            if "pdf" in query.source_hints:
+                rankings.append([(d, score) for d, score in vector if str(d.metadata.get('source', '')).lower().endswith('.pdf')])
+            fused = reciprocal_rank_fusion(rankings, key=DocumentLoader.chunk_id, rrf_k=self.settings.RRF_K)
+            # 4. 비슷한 조각이 문맥을 채우지 않도록 MMR로 CONTEXT_DOCS개 선택
+            results = mmr_select(fused, k=self.settings.CONTEXT_DOCS, lambda_mult=self.settings.MMR_LAMBDA)
+            stats["fused"] = len(fused)
+            stats["cut_by_mmr"] = len(fused) - len(results)
+        stats["selected"] = len(results)
+        stats["no_answer"] = not results
+        self.retrieval_stats.record(stats)
+        logger.info("검색 완료", extra={"retrieval": stats})
+        return results
+
+    def _build_context(self, question: str, results) -> Optional[str]:
+        """검색 결과를 LLM에 넘길 문맥 문자열로 만든다. 쓸 문서가 없으면 None"""
+        # 3. LLM에게 전달할 문맥 생성 (융합 순위 상위 CONTEXT_DOCS개를 겹침 없이 합쳐 토큰 예산 안에서)
+        return pack_context(
+            results,
+            max_docs=self.settings.CONTEXT_DOCS,
+            token_budget=self.settings.CONTEXT_TOKEN_BUDGET,
+        )
+
+    def _build_chain(self):
+        # 4. LLM 지시사항 강화
+        prompt = PromptTemplate.from_template(RAG_TEMPLATE)
+        return prompt | self.llm | StrOutputParser()
+
+_bot: Optional[Dask_AI] = None
+
+def get_bot() -> Dask_AI:
+    """싱글톤 인스턴스를 처음 부를 때 만든다.
 
-# 싱글톤 인스턴스 생성
-bot = Dask_AI()
+    모듈 임포트 시점에 만들면 PDF 파싱 풀(spawn)이 __main__을 다시 임포트할 때마다
+    워커 프로세스에서도 Dask_AI 전체(Gemini 클라이언트, 벡터 DB, 동기화 스레드)가 떠 버린다.
+    """
+    global _bot
+    if _bot is None:
+        _bot = Dask_AI()
+    return _bot
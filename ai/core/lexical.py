@@ -0,0 +1,167 @@
+# 한국어 문자 n-gram 기반 BM25 인덱스 (벡터 검색과 함께 쓰는 어휘 검색)
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from langchain_community.docstore.document import Document
+
+from ai.core.telemetry import get_logger
+
+logger = get_logger("lexical")
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """어절을 문자 바이그램으로 쪼갠다. 숫자가 든 어절(제12조, 3항 등)은 통째로도 넣어 정확 일치를 살린다."""
+    terms = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if len(word) == 1:
+            terms.append(word)
+            continue
+        terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+        if any(ch.isdigit() for ch in word):
+            terms.append(word)
+    return terms
+
+
+class LexicalIndex:
+    """조각 ID 단위로 추가/삭제되는 BM25 역색인. DB_DIR 옆에 JSON으로 저장한다."""
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        # 조각 ID -> {"tf": {용어: 빈도}, "len": 길이, "content": 본문, "metadata": 메타데이터}
+        self._docs: Dict[str, dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_len = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def ids(self):
+        with self._lock:
+            return set(self._docs)
+
+    def _index_locked(self, doc_id: str, entry: dict):
+        self._docs[doc_id] = entry
+        self._total_len += entry["len"]
+        for term, freq in entry["tf"].items():
+            self._postings[term][doc_id] = freq
+
+    def add(self, doc_id: str, doc: Document):
+        terms = tokenize(doc.page_content)
+        entry = {
+            "tf": dict(Counter(terms)),
+            "len": len(terms),
+            "content": doc.page_content,
+            "metadata": dict(doc.metadata),
+        }
+        with self._lock:
+            if doc_id in self._docs:
+                self.remove(doc_id)
+            self._index_locked(doc_id, entry)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            entry = self._docs.pop(doc_id, None)
+            if entry is None:
+                return
+            self._total_len -= entry["len"]
+            for term in entry["tf"]:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def sync(self, current: Dict[str, Document]) -> Tuple[int, int]:
+        """현재 조각 목록과 맞춰 바뀐 부분만 반영. (추가 수, 삭제 수) 반환"""
+        with self._lock:
+            stale = [doc_id for doc_id in self._docs if doc_id not in current]
+            for doc_id in stale:
+                self.remove(doc_id)
+            added = 0
+            for doc_id, doc in current.items():
+                if doc_id not in self._docs:
+                    self.add(doc_id, doc)
+                    added += 1
+            return added, len(stale)
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[Document, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return []
+            avg_len = self._total_len / n_docs or 1
+            scores = defaultdict(float)
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, freq in posting.items():
+                    doc_len = self._docs[doc_id]["len"]
+                    norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+                    scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                (Document(page_content=self._docs[doc_id]["content"], metadata=self._docs[doc_id]["metadata"]), score)
+                for doc_id, score in top
+            ]
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"어휘 인덱스 로드 실패: {e}")
+            return False
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._total_len = 0
+            for doc_id, entry in data.get("docs", {}).items():
+                self._index_locked(doc_id, entry)
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"docs": self._docs}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def term_coverage(query: str, doc: Document) -> float:
+    """질문 용어 중 문서에 그대로 들어 있는 비율 (정확 일치 판단용)"""
+    terms = set(tokenize(query))
+    if not terms:
+        return 0.0
+    doc_terms = set(tokenize(doc.page_content))
+    return len(terms & doc_terms) / len(terms)
+
+
+def reciprocal_rank_fusion(result_lists, key, rrf_k: int = 60) -> List[Tuple[Document, float]]:
+    """여러 검색 결과의 순위를 RRF로 합친다. 점수 척도가 달라도 순위만으로 섞을 수 있다."""
+    scores = defaultdict(float)
+    docs = {}
+    for results in result_lists:
+        for rank, (doc, _) in enumerate(results):
+            doc_key = key(doc)
+            scores[doc_key] += 1.0 / (rrf_k + rank + 1)
+            docs.setdefault(doc_key, doc)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(docs[doc_key], score) for doc_key, score in ranked]
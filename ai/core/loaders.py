@@ -1,18 +1,303 @@
 
 import os
 import json
-from typing import List
+import hashlib
+import multiprocessing
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.docstore.document import Document
 from langchain_chroma import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from ai.core.lexical import LexicalIndex
+from ai.core.scheduler import EmbeddingScheduler
+from ai.core.telemetry import INDEX_BUILDING, INDEX_CHUNKS_DONE, INDEX_CHUNKS_TOTAL, INDEX_LAST_SYNC, get_logger
+
+logger = get_logger("loaders")
+
+
+# 2: 공지 조각에 link 메타데이터 추가 (조각 ID에도 반영)
+MANIFEST_VERSION = 2
+
+
+def _parse_pdf(pdf_path: str):
+    """프로세스 풀에서 실행되는 PDF 파서. [(페이지 텍스트, 메타데이터)] 또는 오류 메시지 반환"""
+    try:
+        pages = PyPDFLoader(pdf_path).load()
+        return [(page.page_content, dict(page.metadata)) for page in pages]
+    except Exception as e:
+        return str(e)
+
+
+class NumpyVectorStore:
+    """Chroma 대신 쓸 수 있는 메모리 매핑 NumPy 벡터 저장소.
+
+    정규화한 임베딩을 행 단위로 이어 붙인 float32/float16 행렬 파일(vectors.bin)을 np.memmap으로 열고,
+    같은 순서의 메타데이터 표(rows.jsonl)를 메모리에 둔다. 검색은 행렬 곱 한 번으로 하는 정확한 코사인 top-k.
+    점수는 Chroma와 같이 '작을수록 가까운' 거리(1 - 코사인 유사도)로 돌려준다.
+    행 추가는 두 파일 끝에 덧붙이고, 삭제는 묘비(deleted.json)로 표시한 뒤 일정 비율이 넘으면 압축한다.
+    압축은 새 세대 디렉터리(gen-N)에 파일을 모두 쓴 뒤 info.json의 generation만 원자적으로 바꿔 전환하므로,
+    읽기 워커는 info.json이 가리키는 한 세대의 파일만 함께 읽는다 (새 벡터와 옛 행이 섞이지 않음).
+    워커끼리 공유되는 것은 페이지 캐시에 올라간 벡터 행렬뿐이고, 행 메타데이터는 워커마다 메모리에 든다.
+    """
+
+    def __init__(self, path: str, embedding_function=None, dtype: str = "float32"):
+        self.path = path
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+        self._rows: List[dict] = []
+        self._row_of: Dict[str, int] = {}
+        self._deleted = set()
+        self._dim: Optional[int] = None
+        self._generation = 0
+        self._matrix = None
+        self._mapped_rows = 0
+        self._torn_tail = False
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    # --- 파일 배치 ---
+    def _gen_dir(self, generation: int) -> str:
+        # 0세대는 세대 디렉터리를 쓰기 전의 배치 (저장소 루트에 바로 파일이 있음)
+        return self.path if generation == 0 else os.path.join(self.path, f"gen-{generation}")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self._gen_dir(self._generation), name)
+
+    def _info_path(self) -> str:
+        return os.path.join(self.path, "info.json")
+
+    def _write_info(self):
+        """차원/자료형/현재 세대를 담은 포인터 파일을 원자적으로 교체"""
+        tmp_path = self._info_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self._dim, "dtype": self.dtype.name, "generation": self._generation}, f)
+        os.replace(tmp_path, self._info_path())
+
+    def _load(self):
+        if not os.path.exists(self._info_path()):
+            return
+        with open(self._info_path(), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        self._dim = info["dim"]
+        self.dtype = np.dtype(info["dtype"])
+        self._generation = info.get("generation", 0)
+        rows = []
+        if os.path.exists(self._file("rows.jsonl")):
+            with open(self._file("rows.jsonl"), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break  # 쓰다 만 마지막 줄
+        # 중간에 죽었을 때 두 파일 길이가 다를 수 있으므로 짧은 쪽에 맞춘다
+        row_bytes = self._dim * self.dtype.itemsize
+        vec_rows = os.path.getsize(self._file("vectors.bin")) // row_bytes if os.path.exists(self._file("vectors.bin")) else 0
+        n = min(len(rows), vec_rows)
+        # 여기서는 파일을 고치지 않는다 (읽기 전용 워커가 빌더의 쓰기를 자르지 않도록). 다음 upsert에서 정리
+        self._torn_tail = n != len(rows) or n != vec_rows
+        self._rows = rows[:n]
+        if os.path.exists(self._file("deleted.json")):
+            with open(self._file("deleted.json"), "r", encoding="utf-8") as f:
+                self._deleted = {i for i in json.load(f) if i < n}
+        self._row_of = {r["id"]: i for i, r in enumerate(self._rows) if i not in self._deleted}
+
+    def _repair_tail(self):
+        """중간에 멈춰 길이가 어긋난 두 파일을 마지막 온전한 행까지 자른다"""
+        if os.path.exists(self._file("vectors.bin")):
+            os.truncate(self._file("vectors.bin"), len(self._rows) * self._dim * self.dtype.itemsize)
+        self._write_rows(self._rows)
+        self._torn_tail = False
+
+    def _write_rows(self, rows: List[dict], directory: Optional[str] = None):
+        directory = directory or self._gen_dir(self._generation)
+        tmp_path = os.path.join(directory, "rows.jsonl.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, os.path.join(directory, "rows.jsonl"))
+
+    def _save_deleted(self):
+        tmp_path = self._file("deleted.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(self._deleted), f)
+        os.replace(tmp_path, self._file("deleted.json"))
+
+    def _mapped(self):
+        """행 수가 바뀌었을 때만 다시 매핑"""
+        n = len(self._rows)
+        if self._matrix is None or self._mapped_rows != n:
+            self._matrix = (
+                np.memmap(self._file("vectors.bin"), dtype=self.dtype, mode="r", shape=(n, self._dim))
+                if n else None
+            )
+            self._mapped_rows = n
+        return self._matrix
+
+    # --- 쓰기 ---
+    def count(self) -> int:
+        with self._lock:
+            return len(self._row_of)
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = (vectors / np.where(norms == 0, 1, norms)).astype(self.dtype)
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._write_info()
+            if self._torn_tail:
+                self._repair_tail()
+            replaced = [self._row_of[i] for i in ids if i in self._row_of]
+            start = len(self._rows)
+            new_rows = [{"id": i, "content": d, "metadata": m} for i, d, m in zip(ids, documents, metadatas)]
+            # 벡터를 먼저 쓰고 메타데이터를 나중에 써서, 중간에 죽어도 짧은 쪽 길이로 복구되게 한다
+            with open(self._file("vectors.bin"), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._file("rows.jsonl"), "a", encoding="utf-8") as f:
+                for row in new_rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self._rows.extend(new_rows)
+            for offset, row in enumerate(new_rows):
+                self._row_of[row["id"]] = start + offset
+            if replaced:
+                self._deleted.update(replaced)
+                self._save_deleted()
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for i in ids:
+                row = self._row_of.pop(i, None)
+                if row is not None:
+                    self._deleted.add(row)
+            self._save_deleted()
+            if self._rows and len(self._deleted) > len(self._rows) * 0.2:
+                self._compact()
+
+    def _compact(self):
+        """묘비가 많아지면 살아 있는 행만 다음 세대 디렉터리에 다시 쓰고 info.json을 바꿔 전환한다"""
+        keep = [i for i in range(len(self._rows)) if i not in self._deleted]
+        matrix = self._mapped()
+        kept = np.array(matrix[keep]) if keep else np.zeros((0, self._dim), dtype=self.dtype)
+        rows = [self._rows[i] for i in keep]
+        generation = self._generation + 1
+        gen_dir = self._gen_dir(generation)
+        os.makedirs(gen_dir, exist_ok=True)
+        with open(os.path.join(gen_dir, "vectors.bin"), "wb") as f:
+            f.write(kept.tobytes())
+        self._write_rows(rows, gen_dir)
+        if os.path.exists(os.path.join(gen_dir, "deleted.json")):
+            os.remove(os.path.join(gen_dir, "deleted.json"))  # 중간에 멈춘 예전 압축이 남긴 묘비
+        # 새 세대 파일이 모두 준비된 뒤에만 포인터를 바꾼다
+        self._generation = generation
+        self._write_info()
+        self._matrix = None
+        self._mapped_rows = -1
+        self._rows = rows
+        self._deleted = set()
+        self._row_of = {r["id"]: i for i, r in enumerate(self._rows)}
+        self._drop_old_generations()
+
+    def _drop_old_generations(self):
+        """현재와 바로 이전 세대만 남긴다 (이전 세대는 아직 그 파일을 읽고 있을 수 있는 읽기 워커 몫)"""
+        oldest_kept = self._generation - 1
+        if oldest_kept > 0:
+            for name in ("vectors.bin", "rows.jsonl", "deleted.json"):
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+        for entry in os.listdir(self.path):
+            if entry.startswith("gen-") and entry[4:].isdigit() and int(entry[4:]) < oldest_kept:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    def reset_collection(self):
+        with self._lock:
+            self._matrix = None
+            # 포인터를 먼저 지워 읽기 워커가 반쯤 지워진 세대를 열지 않게 한다
+            if os.path.exists(self._info_path()):
+                os.remove(self._info_path())
+            for name in ("vectors.bin", "rows.jsonl", "deleted.json"):
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+            for entry in os.listdir(self.path):
+                if entry.startswith("gen-"):
+                    shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+            self._rows, self._row_of, self._deleted, self._dim = [], {}, set(), None
+            self._generation = 0
+            self._torn_tail = False
+
+    # --- 검색 ---
+    def similarity_search_by_vector_batch(self, query_vectors, k: int = 4) -> List[List[Tuple[Document, float]]]:
+        """여러 질문 벡터를 행렬 곱 한 번으로 검색. 질문마다 [(문서, 거리)] 목록"""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        with self._lock:
+            matrix = self._mapped()
+            if matrix is None:
+                return [[] for _ in range(len(queries))]
+            scores = np.asarray(matrix @ queries.T, dtype=np.float32)  # (행, 질문), float16도 float32로 계산
+            if self._deleted:
+                scores[sorted(self._deleted)] = -np.inf
+            rows = self._rows
+        k = min(k, scores.shape[0])
+        results = []
+        for col in range(scores.shape[1]):
+            column = scores[:, col]
+            top = np.argpartition(-column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+            top = top[np.argsort(-column[top])]
+            results.append([
+                (Document(page_content=rows[i]["content"], metadata=rows[i]["metadata"]), float(1 - column[i]))
+                for i in top if np.isfinite(column[i])
+            ])
+        return results
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k: int = 4) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_batch([embedding], k=k)[0]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embedding_function.embed_query(query), k=k)
+
+def _store_count(vector_db) -> int:
+    if isinstance(vector_db, NumpyVectorStore):
+        return vector_db.count()
+    return vector_db._collection.count()
+
+
+def relevance_score(vector_db, distance: float) -> float:
+    """저장소가 돌려준 거리(작을수록 가까움)를 코사인 유사도로 바꾼다 (Gemini 임베딩은 정규화되어 있음)"""
+    if isinstance(vector_db, NumpyVectorStore):
+        return 1.0 - distance
+    metadata = getattr(vector_db._collection, "metadata", None) or {}
+    if metadata.get("hnsw:space", "l2") == "l2":
+        return 1.0 - distance / 2  # 단위 벡터의 L2 제곱 거리 = 2 - 2cos
+    return 1.0 - distance  # cosine / ip
+
+
+def _store_upsert(vector_db, ids, embeddings, documents, metadatas):
+    """미리 계산한 임베딩을 그대로 저장 (Chroma는 내부 컬렉션에 직접 upsert)"""
+    target = vector_db if isinstance(vector_db, NumpyVectorStore) else vector_db._collection
+    target.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+
 class DocumentLoader:
     def __init__(self, settings):
         self.settings = settings
+        chroma_dir = getattr(self.settings, 'DB_DIR', "/app/ai/chroma_db")
+        self.lexical_index = LexicalIndex(os.path.join(chroma_dir, "lexical_index.json"))
+        self.lexical_index.load()
+        # 마지막 load_all_documents에서 모은 문서 단위 원본 (요약 단계 입력)
+        self.summary_sources: List[dict] = []
 
     def load_all_documents(self) -> List[Document]:
         docs = []
+        summary_sources = []
         pdf_count = 0
         
         # 1. crawling.json 로드
@@ -24,45 +309,78 @@ class DocumentLoader:
                     for item in data.get("crawling", []):
                         txt = item.get("contents", "").strip()
                         if txt:
-                            docs.append(Document(page_content=txt, metadata={"source": "crawling.json"}))
+                            # 공지는 모두 같은 출처이므로 문맥에서 공지끼리 구분할 수 있게 링크를 함께 싣는다
+                            metadata = {"source": "crawling.json"}
+                            if item.get("link"):
+                                metadata["link"] = item["link"]
+                            docs.append(Document(page_content=txt, metadata=metadata))
+                            summary_sources.append({
+                                "key": item.get("link") or txt,
+                                "source": "crawling.json",
+                                "title": item.get("title") or txt[:30],
+                                "link": item.get("link"),
+                                "text": txt,
+                            })
             except Exception as e:
-                print(f"로그: crawling.json 로드 중 오류: {e}")
+                logger.warning(f"crawling.json 로드 중 오류: {e}")
 
-        # 2. PDF 로드 (에러 방지 강화)
+        # 2. PDF 로드 (에러 방지 강화) - 캐시에 없는 PDF만 프로세스 풀에서 병렬 파싱
         if os.path.exists(self.settings.DATA_DIR):
-            for fn in os.listdir(self.settings.DATA_DIR):
-                if not fn.lower().endswith(".pdf"):
+            pdf_files = [fn for fn in os.listdir(self.settings.DATA_DIR) if fn.lower().endswith(".pdf")]
+            parsed = {}
+            to_parse = []
+            for fn in pdf_files:
+                pages = self._load_cached_pdf(fn)
+                if pages is None:
+                    to_parse.append(fn)
+                else:
+                    parsed[fn] = pages
+
+            if to_parse:
+                workers = min(len(to_parse), getattr(self.settings, 'PDF_WORKERS', None) or os.cpu_count() or 1)
+                logger.info(f"pdf {len(to_parse)}개 파싱 시작 (캐시 {len(parsed)}개, 프로세스 {workers}개)")
+                paths = [os.path.join(self.settings.DATA_DIR, fn) for fn in to_parse]
+                # 동기화 스레드에서 호출되고 uvicorn/감시/SQLite 스레드가 함께 돌고 있으므로 fork 대신 spawn
+                # (다른 스레드가 쥔 잠금이 복사된 채 fork되면 자식이 영영 멈출 수 있다)
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    for fn, result in zip(to_parse, pool.map(_parse_pdf, paths)):
+                        if isinstance(result, str):
+                            logger.warning(f"{fn} 처리 중 에러 발생: {result}")
+                            continue
+                        parsed[fn] = result
+                        self._save_cached_pdf(fn, result)
+
+            for fn in pdf_files:
+                pages = parsed.get(fn)
+                if pages is None:
                     continue
-                
-                pdf_path = os.path.join(self.settings.DATA_DIR, fn)
-                print(f"로그: pdf 로드 시도 중 -> {fn}")
-                
-                try:
-                    loader = PyPDFLoader(pdf_path)
-                    pages = loader.load()
-                    
-                    added_in_this_file = 0
-                    for i, page in enumerate(pages):
-                        page_txt = page.page_content.strip()
-                        if page_txt:
-                            # 💡 첫 페이지 내용만 살짝 확인
-                            if i == 0:
-                                print(f"   [미리보기] {fn}: {page_txt[:50]}...")
-                            
-                            page.metadata["source"] = fn
-                            docs.append(page)
-                            added_in_this_file += 1
-                    
-                    if added_in_this_file > 0:
-                        pdf_count += 1
-                        print(f"로그: {fn} 로드 성공 ({added_in_this_file} 페이지)")
-                    else:
-                        print(f"⚠️ 경고: {fn}에서 읽을 수 있는 텍스트가 없습니다.")
-                        
-                except Exception as e:
-                    print(f"로그: {fn} 처리 중 에러 발생: {str(e)}")
-
-        print(f"로그: 총 {len(docs)}개의 원본 문서를 확보했습니다. (pdf {pdf_count}개 포함)")
+
+                added_in_this_file = 0
+                page_texts = []
+                for i, (page_txt, metadata) in enumerate(pages):
+                    page_txt = page_txt.strip()
+                    if page_txt:
+                        # 💡 첫 페이지 내용만 살짝 확인
+                        if i == 0:
+                            logger.debug(f"[미리보기] {fn}: {page_txt[:50]}...")
+
+                        metadata = dict(metadata, source=fn)
+                        docs.append(Document(page_content=page_txt, metadata=metadata))
+                        page_texts.append(page_txt)
+                        added_in_this_file += 1
+
+                if added_in_this_file > 0:
+                    summary_sources.append({
+                        "key": fn, "source": fn, "title": os.path.splitext(fn)[0], "link": None,
+                        "text": "\n\n".join(page_texts),
+                    })
+                    pdf_count += 1
+                    logger.info(f"{fn} 로드 성공 ({added_in_this_file} 페이지)")
+                else:
+                    logger.warning(f"{fn}에서 읽을 수 있는 텍스트가 없습니다.")
+
+        logger.info(f"총 {len(docs)}개의 원본 문서를 확보했습니다. (pdf {pdf_count}개 포함)")
+        self.summary_sources = summary_sources
 
         if not docs:
             return []
@@ -74,85 +392,260 @@ class DocumentLoader:
             separators=["\n\n", "\n", " ", ""]
         )
         final_docs = text_splitter.split_documents(docs)
-        print(f"로그: 최종 {len(final_docs)}개의 조각으로 분할 완료.")
+        logger.info(f"최종 {len(final_docs)}개의 조각으로 분할 완료.")
         
         return final_docs
     
+    def _pdf_cache_path(self, fn: str) -> Optional[str]:
+        """경로 + 크기 + 수정 시각으로 만든 PDF 텍스트 캐시 파일 경로"""
+        pdf_path = os.path.join(self.settings.DATA_DIR, fn)
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(pdf_path)}\x00{stat.st_size}\x00{stat.st_mtime_ns}"
+        cache_dir = getattr(self.settings, 'PDF_CACHE_DIR', os.path.join(self.settings.DATA_DIR, ".pdf_cache"))
+        return os.path.join(cache_dir, hashlib.sha256(raw.encode("utf-8")).hexdigest() + ".json")
+
+    def _load_cached_pdf(self, fn: str):
+        path = self._pdf_cache_path(fn)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return [(page["text"], page["metadata"]) for page in json.load(f)]
+        except Exception as e:
+            logger.warning(f"{fn} 캐시 읽기 실패, 다시 파싱합니다: {e}")
+            return None
+
+    def _save_cached_pdf(self, fn: str, pages):
+        path = self._pdf_cache_path(fn)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([{"text": t, "metadata": m} for t, m in pages], f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"{fn} 캐시 저장 실패: {e}")
+
+    @staticmethod
+    def chunk_id(doc: Document) -> str:
+        """출처 + 페이지(공지는 링크) + 내용으로 만든 조각 해시 (내용이 같으면 같은 ID)"""
+        source = str(doc.metadata.get("source", ""))
+        page = str(doc.metadata.get("page", ""))
+        raw = f"{source}\x00{page}\x00{doc.page_content}"
+        link = doc.metadata.get("link")
+        if link:
+            raw = f"{source}\x00{link}\x00{doc.page_content}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def backend(self) -> str:
+        return getattr(self.settings, 'VECTOR_BACKEND', 'chroma')
+
+    def _manifest_path(self) -> str:
+        chroma_dir = getattr(self.settings, 'DB_DIR', "/app/ai/chroma_db")
+        # 백엔드별로 매니페스트를 따로 두어, 백엔드를 바꿔도 서로의 인덱스를 지우지 않게 한다
+        if self.backend == "numpy":
+            return os.path.join(chroma_dir, "index_manifest.numpy.json")
+        return os.path.join(chroma_dir, "index_manifest.json")
+
+    def load_manifest(self) -> Optional[dict]:
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"인덱스 매니페스트 로드 실패: {e}")
+            return None
+
+    def source_fingerprint(self) -> dict:
+        """원본 파일(crawling.json, PDF)의 크기/수정 시각. 파싱 없이 변경 여부를 판단하는 데 사용"""
+        fingerprint = {}
+        if not os.path.exists(self.settings.DATA_DIR):
+            return fingerprint
+        for fn in sorted(os.listdir(self.settings.DATA_DIR)):
+            if fn != "crawling.json" and not fn.lower().endswith(".pdf"):
+                continue
+            stat = os.stat(os.path.join(self.settings.DATA_DIR, fn))
+            fingerprint[fn] = [stat.st_size, stat.st_mtime_ns]
+        return fingerprint
+
+    def save_manifest(self, ids, sources: Optional[dict] = None):
+        """인덱스에 들어간 조각 ID 목록을 원자적으로 저장 (중간에 죽어도 파일이 깨지지 않게)
+
+        sources는 동기화가 끝까지 완료됐을 때만 기록한다. 비어 있으면 다음 기동 때 다시 동기화한다.
+        """
+        path = self._manifest_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        manifest = {
+            "collection": getattr(self.settings, 'COLLECTION_NAME', 'langchain'),
+            "embed_model": getattr(self.settings, 'EMBED_MODEL', ''),
+            "sources": sources or {},
+            "version": MANIFEST_VERSION,
+            "ids": sorted(ids),
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _valid_manifest(self, manifest: Optional[dict]) -> bool:
+        return (
+            manifest is not None
+            and manifest.get("collection") == getattr(self.settings, 'COLLECTION_NAME', 'langchain')
+            and manifest.get("embed_model") == getattr(self.settings, 'EMBED_MODEL', '')
+        )
+
+    def _open_store(self, embeddings):
+        """Settings.VECTOR_BACKEND에 따라 Chroma 또는 NumpyVectorStore를 연다"""
+        if self.backend == "numpy":
+            chroma_dir = getattr(self.settings, 'DB_DIR', "/app/ai/chroma_db")
+            return NumpyVectorStore(
+                os.path.join(chroma_dir, "numpy_index"),
+                embedding_function=embeddings,
+                dtype=getattr(self.settings, 'NUMPY_INDEX_DTYPE', 'float32'),
+            )
+        return Chroma(
+            collection_name=getattr(self.settings, 'COLLECTION_NAME', 'langchain'),
+            persist_directory=getattr(self.settings, 'DB_DIR', "/app/ai/chroma_db"),
+            embedding_function=embeddings,
+        )
+
+    def open_existing(self, embeddings):
+        """원본을 파싱하지 않고 매니페스트만으로 기존 VectorDB를 연다.
+
+        (VectorDB 또는 None, 원본과 일치 여부) 반환. 일치하지 않으면 get_vector_db로 동기화가 필요하다.
+        """
+        manifest = self.load_manifest()
+        if not self._valid_manifest(manifest) or not manifest.get("ids"):
+            return None, False
+        try:
+            vector_db = self._open_store(embeddings)
+            count = _store_count(vector_db)
+        except Exception as exc:
+            logger.warning(f"기존 VectorDB 열기 실패: {exc}")
+            return None, False
+        if count != len(manifest["ids"]):
+            logger.warning(f"VectorDB 조각 수가 매니페스트와 다릅니다. ({count} / {len(manifest['ids'])})")
+            return vector_db, False
+        # 조각 ID/메타데이터 형식이 바뀐 예전 인덱스는 그대로 서빙하면서 한 번 다시 동기화한다
+        up_to_date = manifest.get("sources") == self.source_fingerprint() and manifest.get("version") == MANIFEST_VERSION
+        return vector_db, up_to_date
+
+    def reload_lexical_index(self):
+        """빌더가 저장한 어휘 인덱스를 새 객체로 읽어 한 번에 교체 (읽기 전용 워커용)"""
+        lexical_index = LexicalIndex(self.lexical_index.path)
+        if lexical_index.load():
+            self.lexical_index = lexical_index
+
     def get_vector_db(self, embeddings):
-        """할당량 제한(429)을 절대 넘지 않는 안전 모드"""
+        """매니페스트의 조각 해시와 비교해 바뀐 조각만 임베딩/삭제하는 증분 동기화"""
+        # 파싱 도중 원본이 바뀌어도 다음 동기화에서 잡히도록 지문을 먼저 떠 둔다
+        sources = self.source_fingerprint()
         all_docs = self.load_all_documents()
-        chroma_dir = getattr(self.settings, 'DB_DIR', "/app/ai/chroma_db")
-        collection_name = getattr(self.settings, 'COLLECTION_NAME', 'langchain')
 
-        if os.path.exists(chroma_dir) and os.listdir(chroma_dir):
-            try:
-                vector_db = Chroma(
-                    collection_name=collection_name,
-                    persist_directory=chroma_dir,
-                    embedding_function=embeddings,
-                )
-                existing_count = vector_db._collection.count()
-                if all_docs and existing_count < len(all_docs):
-                    raise RuntimeError(
-                        f"부분적으로만 빌드된 VectorDB 발견: {existing_count} / {len(all_docs)}"
-                    )
-                vector_db.similarity_search("테스트", k=1)
-                return vector_db
-            except Exception as exc:
-                print(f"로그: 기존 VectorDB 로드 또는 검증 실패: {exc}. 재생성합니다.")
-                import chromadb
-                client_settings = chromadb.config.Settings(
-                    is_persistent=True,
-                    persist_directory=chroma_dir,
-                )
-                client = chromadb.Client(client_settings)
-                existing_collections = client.list_collections()
-                existing_names = [
-                    c if isinstance(c, str) else getattr(c, 'name', None)
-                    for c in existing_collections
-                ]
-                if collection_name in existing_names:
-                    client.delete_collection(name=collection_name)
-
-        print(f"VectorDB 생성 시작 (총 {len(all_docs)}개 조각)...")
-        
-        import time
-        # ✅ 배치 크기를 줄여 Google Embedding 쿼터 초과를 방지합니다.
-        batch_size = 10
-        
-        # 첫 번째 배치
-        initial_batch = all_docs[:batch_size]
+        # 같은 내용의 조각은 한 번만 인덱싱
+        current = {}
+        for doc in all_docs:
+            current.setdefault(self.chunk_id(doc), doc)
+
+        # 어휘 인덱스는 API 호출이 없으므로 VectorDB 상태와 관계없이 먼저 맞춘다
+        added, removed = self.lexical_index.sync(current)
+        if added or removed:
+            self.lexical_index.save()
+            logger.info(f"어휘 인덱스 갱신 (추가 {added}개 / 삭제 {removed}개)")
+
+        try:
+            vector_db = self._open_store(embeddings)
+        except Exception as exc:
+            logger.warning(f"VectorDB 열기 실패: {exc}. VectorDB를 사용할 수 없습니다.")
+            return None
+
+        manifest = self.load_manifest()
+        if self._valid_manifest(manifest):
+            indexed = set(manifest.get("ids", []))
+        else:
+            # 매니페스트가 없거나 모델이 바뀐 경우: ID 없이 만든 예전 인덱스이므로 한 번만 전체 재생성
+            if _store_count(vector_db) > 0:
+                logger.info("매니페스트가 없는 VectorDB 발견. 전체 재생성합니다.")
+                vector_db.reset_collection()
+            indexed = set()
+
+        to_delete = sorted(indexed - current.keys())
+        to_add = [cid for cid in current if cid not in indexed]
+        logger.info(f"VectorDB 동기화 (추가 {len(to_add)}개 / 삭제 {len(to_delete)}개 / 유지 {len(indexed) - len(to_delete)}개)")
+
+        if to_delete:
+            vector_db.delete(ids=to_delete)
+            indexed -= set(to_delete)
+            self.save_manifest(indexed)
+
+        if not to_add:
+            self.save_manifest(indexed, sources)
+            INDEX_LAST_SYNC.set_to_current_time()
+            return vector_db
+
+        INDEX_CHUNKS_TOTAL.set(len(to_add))
+        INDEX_CHUNKS_DONE.set(0)
+        INDEX_BUILDING.set(1)
+        scheduler = EmbeddingScheduler(
+            embeddings,
+            rate_per_sec=getattr(self.settings, 'EMBED_RATE_PER_SEC', 1.5),
+            burst=getattr(self.settings, 'EMBED_BURST', 20),
+            min_batch=getattr(self.settings, 'EMBED_MIN_BATCH', 5),
+            max_batch=getattr(self.settings, 'EMBED_MAX_BATCH', 50),
+            max_concurrency=getattr(self.settings, 'EMBED_CONCURRENCY', 2),
+        )
+        done_count = 0
+
+        def store_batch(indices, vectors):
+            nonlocal done_count
+            batch_ids = [to_add[i] for i in indices]
+            batch = [current[cid] for cid in batch_ids]
+            _store_upsert(
+                vector_db,
+                ids=batch_ids,
+                embeddings=vectors,
+                documents=[d.page_content for d in batch],
+                metadatas=[d.metadata or {"source": ""} for d in batch],
+            )
+            # 배치마다 매니페스트를 갱신해, 중간에 멈춰도 다음 동기화가 이어서 진행
+            indexed.update(batch_ids)
+            self.save_manifest(indexed)
+            done_count += len(batch_ids)
+            INDEX_CHUNKS_DONE.set(done_count)
+            logger.info(
+                f"벡터화 진행 중... ({done_count} / {len(to_add)}, 배치 {scheduler.batch_size})",
+                extra={"done": done_count, "total": len(to_add), "batch_size": scheduler.batch_size},
+            )
+
         try:
-            vector_db = Chroma.from_documents(
-                documents=initial_batch,
-                embedding=embeddings,
-                collection_name=collection_name,
-                persist_directory=chroma_dir
+            texts = [current[cid].page_content for cid in to_add]
+            # 임베딩 캐시에 이미 있는 조각은 API 호출 없이 바로 저장
+            lookup = getattr(embeddings, "lookup_documents", None)
+            cached = lookup(texts) if lookup else {}
+            if cached:
+                hit_indices = sorted(cached)
+                for i in range(0, len(hit_indices), 500):
+                    part = hit_indices[i:i + 500]
+                    store_batch(part, [cached[j] for j in part])
+            pending = [i for i in range(len(texts)) if i not in cached]
+            scheduler.run(
+                [texts[i] for i in pending],
+                lambda indices, vectors: store_batch([pending[i] for i in indices], vectors),
             )
-            print(f"로그: 첫 번째 배치 완료 ({batch_size} / {len(all_docs)})")
-            time.sleep(10)
-            
-            # 나머지 배치
-            for i in range(batch_size, len(all_docs), batch_size):
-                batch = all_docs[i : i + batch_size]
-                retry_count = 0
-                while True:
-                    try:
-                        vector_db.add_documents(batch)
-                        break
-                    except Exception as exc:
-                        retry_count += 1
-                        message = str(exc)
-                        if retry_count >= 3 or "RESOURCE_EXHAUSTED" not in message:
-                            raise
-                        wait_seconds = 40
-                        print(f"로그: 임베딩 쿼터 초과. {wait_seconds}초 후 재시도합니다. (시도 {retry_count}/3)")
-                        time.sleep(wait_seconds)
-                print(f"로그: 벡터화 진행 중... ({min(i + len(batch), len(all_docs))} / {len(all_docs)})")
-                time.sleep(10)
-                
-            print("로그: VectorDB 생성 완료! 이제 PDF 질문이 가능합니다.")
+            self.save_manifest(indexed, sources)
+            INDEX_LAST_SYNC.set_to_current_time()
+            logger.info("VectorDB 동기화 완료! 이제 PDF 질문이 가능합니다.")
             return vector_db
         except Exception as exc:
-            print(f"로그: VectorDB 생성 실패: {exc}. VectorDB를 사용할 수 없습니다.")
-            return None
+            logger.warning(f"VectorDB 동기화 실패: {exc}. 기존에 인덱싱된 조각만 사용합니다.")
+            return vector_db if indexed else None
+        finally:
+            INDEX_BUILDING.set(0)
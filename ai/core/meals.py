@@ -0,0 +1,144 @@
+# 급식 저장소: 날짜 정렬 배열(기간 조회) + 메뉴 역색인(메뉴 -> 날짜) + 칼로리/알레르기 정보
+import bisect
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+SLOT_ORDER = {"조식": 0, "중식": 1, "석식": 2}
+
+# 학교급식 알레르기 유발 식품 번호 (NEIS 기준)
+ALLERGENS = {
+    1: "난류", 2: "우유", 3: "메밀", 4: "땅콩", 5: "대두", 6: "밀", 7: "고등어", 8: "게", 9: "새우",
+    10: "돼지고기", 11: "복숭아", 12: "토마토", 13: "아황산류", 14: "호두", 15: "닭고기", 16: "쇠고기",
+    17: "오징어", 18: "조개류", 19: "잣",
+}
+
+_CALORIE_RE = re.compile(r"[\d.]+")
+_WORD_RE = re.compile(r"[가-힣A-Za-z]{2,}")
+_JOSA_RE = re.compile(r"(?:이랑|에는|에서|은|는|이|가|을|를|에|도|만|랑)$")
+
+# 메뉴 이름으로 보지 않는 질문 낱말 (급식 단어, 때/순서 표현, 서술어)
+_DISH_STOPWORDS = {
+    "급식", "메뉴", "식단", "조식", "중식", "석식", "아침", "점심", "저녁",
+    "언제", "언제야", "언제요", "다음", "다음주", "이번", "이번주", "오늘", "내일", "모레", "요일",
+    "나와", "나와요", "나오", "나오는", "나오나", "나오나요", "나온다", "나올까", "먹어", "먹을", "먹는",
+    "있어", "있어요", "있나", "있나요", "또", "혹시", "알려줘", "알려주세요",
+}
+
+
+@dataclass
+class MealRecord:
+    date: str  # YYYY-MM-DD
+    slot: str  # 조식 / 중식 / 석식
+    dishes: List[str]
+    calories: Optional[float] = None  # kcal
+    allergies: List[List[int]] = field(default_factory=list)  # dishes와 같은 순서
+
+    def format(self, with_allergies: bool = False) -> str:
+        line = f"[{self.slot}] {', '.join(self.dishes)}"
+        if self.calories is not None:
+            line += f" ({self.calories:g} kcal)"
+        if with_allergies:
+            details = []
+            for dish, codes in zip(self.dishes, self.allergies):
+                if codes:
+                    details.append(f"  - {dish}: {', '.join(ALLERGENS.get(c, str(c)) for c in codes)}")
+            if details:
+                line += "\n" + "\n".join(details)
+        return line
+
+
+class MealStore:
+    """한 번 만든 뒤 바꾸지 않는 급식 스냅샷. 새 데이터가 오면 새 MealStore를 만들어 교체한다."""
+
+    def __init__(self, records: List[MealRecord]):
+        self.records = sorted(records, key=lambda r: (r.date, SLOT_ORDER.get(r.slot, 9)))
+        self._dates = [r.date for r in self.records]  # bisect용 정렬 키
+        self._by_date: Dict[str, Dict[str, MealRecord]] = {}
+        self._dish_index: Dict[str, List[Tuple[str, str]]] = {}
+        for record in self.records:
+            self._by_date.setdefault(record.date, {})[record.slot] = record
+            for dish in record.dishes:
+                self._dish_index.setdefault(dish, []).append((record.date, record.slot))
+
+    def __bool__(self):
+        return bool(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_json(cls, path: str) -> "MealStore":
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = []
+        for item in data:
+            raw_date = str(item.get("날짜", "")).replace("-", "").strip()
+            if len(raw_date) != 8:
+                continue
+            calories = None
+            cal_match = _CALORIE_RE.search(str(item.get("칼로리", "")))
+            if cal_match:
+                try:
+                    calories = float(cal_match.group())
+                except ValueError:
+                    pass
+            names = item.get("요리명", [])
+            codes = item.get("알레르기") or [[] for _ in names]
+            # 빈 메뉴를 거를 때 알레르기 번호도 같이 걸러야 메뉴와 번호의 순서가 맞는다
+            pairs = [(d, c) for d, c in zip(names, codes) if d]
+            dishes = [d for d, _ in pairs]
+            allergies = [c for _, c in pairs]
+            records.append(MealRecord(
+                date=f"{raw_date[:4]}-{raw_date[4:6]}-{raw_date[6:]}",
+                slot=item.get("시간", ""),
+                dishes=dishes,
+                calories=calories,
+                allergies=allergies,
+            ))
+        return cls(records)
+
+    def get(self, date: str) -> Dict[str, MealRecord]:
+        """해당 날짜의 {끼니: 기록}"""
+        return self._by_date.get(date, {})
+
+    def between(self, start: str, end: str) -> List[MealRecord]:
+        """start ~ end (양 끝 포함) 기간의 기록을 날짜/끼니 순으로"""
+        lo = bisect.bisect_left(self._dates, start)
+        hi = bisect.bisect_right(self._dates, end)
+        return self.records[lo:hi]
+
+    def match_dish(self, text: str, require_all: bool = False) -> List[str]:
+        """질문 속 단어가 들어간 메뉴 이름 목록 (예: '치킨' -> ['순살치킨', '치킨마요덮밥'])
+
+        급식 단어/때 표현/서술어는 빼고 남은 낱말로 찾는다 (조사가 붙었으면 뗀 형태로도 찾음).
+        require_all이면 남은 낱말이 모두 어떤 메뉴에 들어 있어야 한다
+        (예: '떡볶이 대회 언제야'는 '대회'가 메뉴가 아니므로 빈 목록).
+        """
+        matched = []
+        for word in _WORD_RE.findall(text):
+            if word in _DISH_STOPWORDS:
+                continue
+            stem = _JOSA_RE.sub("", word)
+            if stem in _DISH_STOPWORDS:
+                continue
+            hits = [dish for dish in self._dish_index if word in dish]
+            if not hits and len(stem) >= 2:
+                hits = [dish for dish in self._dish_index if stem in dish]
+            if not hits and require_all:
+                return []
+            matched.extend(d for d in hits if d not in matched)
+        return matched
+
+    def dish_dates(self, dishes: List[str], after: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """메뉴들이 나오는 (날짜, 끼니, 메뉴) 목록. after가 있으면 그 날짜 이후만"""
+        hits = []
+        for dish in dishes:
+            for date, slot in self._dish_index.get(dish, []):
+                if after is None or date >= after:
+                    hits.append((date, slot, dish))
+        return sorted(hits, key=lambda h: (h[0], SLOT_ORDER.get(h[1], 9)))
@@ -0,0 +1,76 @@
+# 2단계 검색 보조: 점수 컷오프 후 MMR로 다양화, 질의별 컷 통계 집계
+import threading
+from collections import deque
+from typing import List, Tuple
+
+from langchain_community.docstore.document import Document
+
+from ai.core.lexical import tokenize
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def mmr_select(results: List[Tuple[Document, float]], k: int, lambda_mult: float = 0.7) -> List[Tuple[Document, float]]:
+    """관련도 순 결과에서 Maximal Marginal Relevance로 k개를 고른다.
+
+    벡터 저장소가 조각 임베딩을 돌려주지 않으므로 조각 간 유사도는 문자 바이그램 Jaccard로 잰다.
+    관련도는 입력 점수를 최댓값으로 나눠 0~1로 맞춘다.
+    """
+    if len(results) <= 1 or k <= 0:
+        return results[:k]
+    top = max(score for _, score in results) or 1.0
+    relevance = [score / top for _, score in results]
+    terms = [set(tokenize(d.page_content)) for d, _ in results]
+
+    selected = [0]
+    max_sim = [_jaccard(terms[0], t) for t in terms]
+    while len(selected) < min(k, len(results)):
+        best, best_score = None, None
+        for i in range(len(results)):
+            if i in selected:
+                continue
+            score = lambda_mult * relevance[i] - (1 - lambda_mult) * max_sim[i]
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+        max_sim = [max(m, _jaccard(terms[best], t)) for m, t in zip(max_sim, terms)]
+    return [results[i] for i in selected]
+
+
+class RetrievalStats:
+    """질의별 검색 단계 통계. 최근 기록과 누적 합계를 함께 보관한다 (/retrieval/stats 용)
+
+    기록에는 후보/컷 수와 점수만 담고 질문 원문은 넣지 않는다.
+    """
+
+    FIELDS = ("vector_candidates", "lexical_candidates", "cut_by_score", "cut_by_coverage",
+              "fused", "cut_by_mmr", "selected")
+
+    def __init__(self, history: int = 100):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=history)
+        self.queries = 0
+        self.no_answer = 0
+        self.totals = {name: 0 for name in self.FIELDS}
+
+    def record(self, stats: dict):
+        with self._lock:
+            self._recent.append(stats)
+            self.queries += 1
+            self.no_answer += int(stats.get("no_answer", False))
+            for name in self.FIELDS:
+                self.totals[name] += stats.get(name, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            queries = self.queries or 1
+            return {
+                "queries": self.queries,
+                "no_answer": self.no_answer,
+                "average": {name: round(total / queries, 2) for name, total in self.totals.items()},
+                "recent": list(self._recent),
+            }
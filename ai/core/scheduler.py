@@ -0,0 +1,125 @@
+# 임베딩 호출 스케줄러 (토큰 버킷 + 적응형 배치 + 429 백오프)
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Sequence
+
+from ai.core.telemetry import get_logger
+
+logger = get_logger("scheduler")
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """쿼터 초과(429)로 실패한 경우만 재시도 대상"""
+    message = str(exc)
+    return "RESOURCE_EXHAUSTED" in message or "429" in message or "rate limit" in message.lower()
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지는 토큰 버킷. 텍스트 1개 = 토큰 1개"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1):
+        # capacity보다 큰 요청은 버킷이 가득 찰 때까지만 기다리고 나머지는 빚으로 남김
+        need = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= need:
+                    self._tokens -= amount
+                    return
+                wait_seconds = (need - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class EmbeddingScheduler:
+    """embed_documents를 가진 임베딩 객체 앞에서 호출 속도와 배치 크기를 조절한다.
+
+    성공하면 배치를 키우고 429를 받으면 배치를 절반으로 줄인 뒤 지터를 섞어 대기한다.
+    embeddings는 embed_documents(texts)만 있으면 되므로 로컬 가짜 엔드포인트로 교체해 시험할 수 있다.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        rate_per_sec: float = 1.5,
+        burst: float = 20,
+        min_batch: int = 5,
+        max_batch: int = 50,
+        max_concurrency: int = 2,
+        max_retries: int = 5,
+        base_backoff: float = 2.0,
+        max_backoff: float = 60.0,
+    ):
+        self.embeddings = embeddings
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.batch_size = min_batch
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+
+    def _on_success(self):
+        with self._lock:
+            self.batch_size = min(self.max_batch, self.batch_size + max(1, self.batch_size // 2))
+
+    def _on_throttle(self):
+        with self._lock:
+            self.batch_size = max(self.min_batch, self.batch_size // 2)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(len(texts))
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                self._on_success()
+                return vectors
+            except Exception as exc:
+                if not is_rate_limit_error(exc) or attempt == self.max_retries:
+                    raise
+                self._on_throttle()
+                delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning(f"임베딩 쿼터 초과. {delay:.1f}초 후 재시도합니다. (시도 {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def run(self, texts: Sequence[str], on_batch: Callable[[List[int], List[List[float]]], None]):
+        """texts를 배치로 임베딩하고, 끝난 배치마다 on_batch(인덱스 목록, 벡터 목록)를 호출.
+
+        on_batch는 호출한 스레드에서 순서대로 실행되므로 체크포인트 저장을 그 안에서 하면 된다.
+        한 배치라도 재시도 끝에 실패하면 남은 작업을 멈추고 예외를 다시 던진다.
+        """
+        pos = 0
+        total = len(texts)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            running = {}
+            try:
+                while pos < total or running:
+                    while pos < total and len(running) < self.max_concurrency:
+                        indices = list(range(pos, min(pos + self.batch_size, total)))
+                        pos = indices[-1] + 1
+                        future = pool.submit(self._embed_batch, [texts[i] for i in indices])
+                        running[future] = indices
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        indices = running.pop(future)
+                        on_batch(indices, future.result())
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
@@ -0,0 +1,202 @@
+# 문서 요약: 크롤링 공지/PDF를 들여올 때 한 번만 요약해 저장하고, 읽을 때는 저장된 값만 돌려준다
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from ai.core.telemetry import get_logger
+
+logger = get_logger("summaries")
+
+SUMMARY_TEMPLATE = "다음은 학교 공지 또는 규정 문서입니다. 학생이 꼭 알아야 할 핵심 내용을 3~5문장으로 요약하세요. 마크 다운 문법은 사용하지 마세요.\n\n제목: {title}\n\n내용:\n{text}\n\n요약:"
+REDUCE_TEMPLATE = "다음은 긴 문서 '{title}'의 부분별 요약입니다. 중복을 없애고 전체 핵심 내용을 5~8문장으로 다시 요약하세요. 마크 다운 문법은 사용하지 마세요.\n\n부분 요약:\n{text}\n\n전체 요약:"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def summary_id(key: str) -> str:
+    """링크/파일명으로 만든 짧은 문서 ID (/summaries/{id} 조회용)"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def split_for_map(text: str, max_chars: int) -> List[str]:
+    """map 단계용 분할. 가능하면 문단/줄 경계에서 자른다"""
+    parts = []
+    while len(text) > max_chars:
+        cut = max(text.rfind("\n\n", 0, max_chars), text.rfind("\n", 0, max_chars))
+        if cut < max_chars // 2:
+            cut = max_chars
+        parts.append(text[:cut].strip())
+        text = text[cut:]
+    if text.strip():
+        parts.append(text.strip())
+    return [p for p in parts if p]
+
+
+class SummaryStore:
+    """문서 ID -> 요약 기록, 부분 텍스트 해시 -> 부분 요약을 담은 JSON 저장소.
+
+    조회는 메모리 딕셔너리에서 바로 하고, 저장은 임시 파일에 쓴 뒤 교체한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._docs: Dict[str, dict] = {}
+        self._partials: Dict[str, str] = {}
+        self.sources: dict = {}  # 마지막으로 요약한 원본 지문 (DocumentLoader.source_fingerprint)
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        return self._docs.get(doc_id)
+
+    def entries(self) -> List[dict]:
+        docs = list(self._docs.values())
+        return sorted(docs, key=lambda d: d["updated_at"], reverse=True)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"요약 저장소 로드 실패: {e}")
+            return False
+        with self._lock:
+            self._docs = data.get("docs", {})
+            self._partials = data.get("partials", {})
+            self.sources = data.get("sources", {})
+        return True
+
+    def save(self):
+        with self._lock:
+            data = {"sources": self.sources, "docs": self._docs, "partials": self._partials}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+class Summarizer:
+    """원본 문서 목록을 SummaryStore와 맞춘다.
+
+    내용 해시가 같으면 다시 요약하지 않고, 긴 문서는 부분 요약(map) 후 합친다(reduce).
+    부분 요약도 부분 텍스트 해시로 저장해, 긴 PDF의 일부만 바뀌면 바뀐 부분만 다시 요약한다.
+    """
+
+    def __init__(self, llm, store: SummaryStore, map_chars: int = 4000, max_concurrency: int = 4):
+        self.store = store
+        self.map_chars = map_chars
+        self.max_concurrency = max_concurrency
+        self._chain = PromptTemplate.from_template(SUMMARY_TEMPLATE) | llm | StrOutputParser()
+        self._reduce_chain = PromptTemplate.from_template(REDUCE_TEMPLATE) | llm | StrOutputParser()
+
+    def _batch(self, chain, inputs: List[dict]) -> List[Optional[str]]:
+        if not inputs:
+            return []
+        outputs = chain.batch(inputs, config={"max_concurrency": self.max_concurrency}, return_exceptions=True)
+        results = []
+        for output in outputs:
+            if isinstance(output, Exception):
+                logger.warning(f"요약 생성 실패: {output}")
+                results.append(None)
+            else:
+                results.append(output.strip())
+        return results
+
+    def sync(self, documents: List[dict], sources: Optional[dict] = None) -> int:
+        """documents: [{"key", "source", "title", "link", "text"}]. 새로 요약한 문서 수를 반환"""
+        store = self.store
+        current = {}
+        for doc in documents:
+            current.setdefault(summary_id(doc["key"]), doc)
+
+        # 내용이 그대로인 문서는 건너뛰고, 같은 내용이 다른 ID로 이미 요약돼 있으면 재사용
+        by_hash = {d["hash"]: d["summary"] for d in store._docs.values()}
+        todo = {}
+        now = time.time()
+        with store._lock:
+            for doc_id, doc in current.items():
+                h = content_hash(doc["text"])
+                old = store._docs.get(doc_id)
+                if old and old["hash"] == h:
+                    continue
+                if h in by_hash:
+                    store._docs[doc_id] = self._record(doc_id, doc, h, by_hash[h], now)
+                    continue
+                todo[doc_id] = (doc, h)
+            removed = [doc_id for doc_id in store._docs if doc_id not in current]
+            for doc_id in removed:
+                del store._docs[doc_id]
+
+        # 1. map: 짧은 문서는 바로, 긴 문서는 캐시에 없는 부분만 한 번에 배치로 요약
+        short = {doc_id: item for doc_id, item in todo.items() if len(item[0]["text"]) <= self.map_chars}
+        long_parts = {doc_id: split_for_map(item[0]["text"], self.map_chars)
+                      for doc_id, item in todo.items() if doc_id not in short}
+        pending_parts = {}
+        for doc_id, parts in long_parts.items():
+            for part in parts:
+                h = content_hash(part)
+                if h not in store._partials and h not in pending_parts:
+                    pending_parts[h] = {"title": todo[doc_id][0]["title"], "text": part}
+
+        short_ids = list(short)
+        short_out = self._batch(self._chain, [{"title": short[i][0]["title"], "text": short[i][0]["text"]} for i in short_ids])
+        part_out = self._batch(self._chain, list(pending_parts.values()))
+        with store._lock:
+            for h, summary in zip(pending_parts, part_out):
+                if summary is not None:
+                    store._partials[h] = summary
+
+        # 2. reduce: 부분 요약이 모두 있는 긴 문서만 합친다 (실패한 문서는 다음 동기화에서 다시)
+        reduce_ids, reduce_inputs = [], []
+        for doc_id, parts in long_parts.items():
+            partials = [store._partials.get(content_hash(p)) for p in parts]
+            if all(partials):
+                reduce_ids.append(doc_id)
+                reduce_inputs.append({"title": todo[doc_id][0]["title"], "text": "\n".join(partials)})
+        reduce_out = self._batch(self._reduce_chain, reduce_inputs)
+
+        created = 0
+        with store._lock:
+            for doc_id, summary in list(zip(short_ids, short_out)) + list(zip(reduce_ids, reduce_out)):
+                if summary is None:
+                    continue
+                doc, h = todo[doc_id]
+                store._docs[doc_id] = self._record(doc_id, doc, h, summary, now)
+                if doc_id in long_parts:
+                    store._docs[doc_id]["parts"] = [content_hash(p) for p in long_parts[doc_id]]
+                created += 1
+            # 현재 문서(와 다음에 다시 시도할 문서)에 쓰이는 부분 요약만 남긴다
+            used = {h for d in store._docs.values() for h in d.get("parts", [])}
+            used |= {content_hash(p) for parts in long_parts.values() for p in parts}
+            store._partials = {h: s for h, s in store._partials.items() if h in used}
+            if sources is not None and created == len(todo):
+                store.sources = sources
+            store.save()
+        if todo or removed:
+            logger.info(f"문서 요약 갱신 (새로 요약 {created}/{len(todo)}개, 삭제 {len(removed)}개)")
+        return created
+
+    @staticmethod
+    def _record(doc_id: str, doc: dict, h: str, summary: str, now: float) -> dict:
+        return {
+            "id": doc_id,
+            "source": doc["source"],
+            "title": doc["title"],
+            "link": doc.get("link"),
+            "hash": h,
+            "summary": summary,
+            "updated_at": now,
+        }
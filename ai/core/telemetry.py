@@ -0,0 +1,98 @@
+# 관측: 구조화 로그(JSON 한 줄) + Prometheus 지표 (단계별 지연, 라우팅/캐시/오류 카운터, 인덱스 진행률)
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+# 멀티 워커 모드: 각 워커가 이 디렉터리에 지표 파일을 쓰고 /metrics가 모두 합친다 (기동 시 비어 있어야 함)
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# logging.LogRecord 기본 속성. 이 밖의 extra 필드는 JSON에 그대로 싣는다
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED and not k.startswith("_")})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _configure():
+    root = logging.getLogger("dask_ai")
+    if root.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("DASK_LOG_FORMAT", "json") == "text":
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(os.getenv("DASK_LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """'dask_ai.<name>' 로거. 첫 호출 때 stdout JSON 핸들러를 붙인다"""
+    _configure()
+    return logging.getLogger(f"dask_ai.{name}")
+
+
+# --- 지표 ---
+# 멀티 워커(uvicorn --workers)에서는 PROMETHEUS_MULTIPROC_DIR을 지정하면 워커 지표를 합쳐서 내보낸다
+STAGE_SECONDS = Histogram(
+    "dask_ai_stage_seconds",
+    "질문 처리 단계별 소요 시간",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+ROUTES = Counter("dask_ai_requests_total", "의도/처리 경로별 질문 수", ["intent", "route"])
+CACHE_EVENTS = Counter("dask_ai_cache_events_total", "캐시 조회 결과", ["cache", "result"])
+ERRORS = Counter("dask_ai_errors_total", "단계별 오류 수", ["stage"])
+INDEX_CHUNKS_TOTAL = Gauge("dask_ai_index_chunks_total", "현재 동기화에서 임베딩할 조각 수", multiprocess_mode="livemax")
+INDEX_CHUNKS_DONE = Gauge("dask_ai_index_chunks_done", "현재 동기화에서 저장한 조각 수", multiprocess_mode="livemax")
+INDEX_BUILDING = Gauge("dask_ai_index_building", "인덱스 동기화 진행 중 여부 (1/0)", multiprocess_mode="livemax")
+INDEX_LAST_SYNC = Gauge("dask_ai_index_last_sync_timestamp", "마지막 동기화 완료 시각 (unix)", multiprocess_mode="livemax")
+
+
+@contextmanager
+def timed(stage: str):
+    """with 블록 소요 시간을 stage 히스토그램에 기록. 예외가 나면 오류 카운터도 올린다"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def mark_worker_dead():
+    """워커 종료 시 호출. livemax 게이지에서 이 프로세스 값을 빼고 파일을 정리한다"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid(), MULTIPROC_DIR)
+
+
+def metrics_payload():
+    """/metrics 응답 (본문, Content-Type)"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,136 @@
+# 시간표 저장소: 교시 단위 기록 + 선생님/과목 역색인
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass
+class TimetableSlot:
+    grade: str
+    class_num: str
+    date: str  # YYYY-MM-DD
+    weekday: str  # 월 ~ 금
+    period: int
+    subject: Optional[str]
+    teacher: Optional[str]
+    # 시간표가 바뀐 경우 원래 수업 (comcigan.json의 '원래 과목')
+    original_subject: Optional[str] = None
+    original_teacher: Optional[str] = None
+    original_period: Optional[int] = None
+
+    @property
+    def class_key(self) -> str:
+        return f"{self.grade}-{self.class_num}"
+
+    @property
+    def replaced(self) -> bool:
+        return self.original_subject is not None
+
+    def format(self) -> str:
+        line = f"{self.period}교시: {self.subject or '-'} ({self.teacher or ''})"
+        if self.replaced:
+            line += f" ← 원래 {self.original_period}교시 {self.original_subject}"
+        return line
+
+
+def _period_number(name: str) -> Optional[int]:
+    match = re.search(r"\d+", name)
+    return int(match.group()) if match else None
+
+
+class TimetableStore:
+    """한 번 만든 뒤 바꾸지 않는 시간표 스냅샷. 새 데이터가 오면 새 TimetableStore를 만들어 교체한다."""
+
+    def __init__(self, slots: List[TimetableSlot]):
+        self.slots = sorted(slots, key=lambda s: (s.date, s.grade, s.class_num, s.period))
+        self._by_class: Dict[str, Dict[str, List[TimetableSlot]]] = {}
+        self._by_teacher: Dict[str, List[TimetableSlot]] = {}
+        self._by_subject: Dict[str, List[TimetableSlot]] = {}
+        for slot in self.slots:
+            self._by_class.setdefault(slot.class_key, {}).setdefault(slot.date, []).append(slot)
+            if slot.teacher:
+                self._by_teacher.setdefault(slot.teacher, []).append(slot)
+            if slot.subject:
+                self._by_subject.setdefault(slot.subject, []).append(slot)
+
+    def __bool__(self):
+        return bool(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    @classmethod
+    def from_json(cls, path: str) -> "TimetableStore":
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        slots = []
+        for item in data:
+            for grade, classes in item.items():
+                for class_name, dates in classes.items():
+                    # "1학년", "1반"에서 숫자만 추출
+                    g_num = re.search(r"\d+", grade)
+                    c_num = re.search(r"\d+", class_name)
+                    if not (g_num and c_num): continue
+
+                    for r_date, periods in dates.items():
+                        # "20260223-월요일" 에서 날짜와 요일 추출
+                        d_match = re.search(r"(\d{8})(?:-(\S)요일)?", r_date)
+                        if not d_match: continue
+                        d8 = d_match.group(1)
+
+                        for p_name, info in periods.items():
+                            period = _period_number(p_name)
+                            if period is None: continue
+                            slot = TimetableSlot(
+                                grade=g_num.group(),
+                                class_num=c_num.group(),
+                                date=f"{d8[:4]}-{d8[4:6]}-{d8[6:]}",
+                                weekday=d_match.group(2) or "",
+                                period=period,
+                                subject=info.get("과목") or None,
+                                teacher=info.get("선생님") or None,
+                            )
+                            for o_name, orig in (info.get("원래 과목") or {}).items():
+                                slot.original_subject = orig.get("과목")
+                                slot.original_teacher = orig.get("선생님")
+                                slot.original_period = _period_number(o_name)
+                            # 과목이 비어 있으면 원래 과목으로 채움 (기존 표시 방식 유지)
+                            if not slot.subject and slot.original_subject:
+                                slot.subject = slot.original_subject
+                                slot.teacher = slot.original_teacher
+                            slots.append(slot)
+        return cls(slots)
+
+    def day(self, grade: str, class_num: str, date: str) -> List[TimetableSlot]:
+        """해당 반, 해당 날짜의 과목이 있는 교시 목록"""
+        return [s for s in self._by_class.get(f"{grade}-{class_num}", {}).get(date, []) if s.subject]
+
+    def between(self, grade: str, class_num: str, start: str, end: str) -> Dict[str, List[TimetableSlot]]:
+        by_date = self._by_class.get(f"{grade}-{class_num}", {})
+        return {d: [s for s in slots if s.subject] for d, slots in sorted(by_date.items()) if start <= d <= end}
+
+    def match_teacher(self, name: str) -> List[str]:
+        """'김OO' 같은 이름이 들어가거나 앞부분이 같은 선생님 이름 목록"""
+        name = name.strip()
+        # 컴시간은 이름 일부를 가려서 주는 경우가 있어(예: 김철*) 가린 앞부분으로도 비교
+        return [t for t in self._by_teacher if name in t or (t.rstrip("*") and name.startswith(t.rstrip("*")))]
+
+    def match_subject(self, text: str) -> List[str]:
+        words = re.findall(r"[가-힣A-Za-z]{2,}", text)
+        return [s for s in self._by_subject if any(w in s for w in words)]
+
+    def teacher_slots(self, teachers: List[str], start: str = "", end: str = "9999") -> List[TimetableSlot]:
+        hits = [s for t in teachers for s in self._by_teacher.get(t, []) if start <= s.date <= end]
+        return sorted(hits, key=lambda s: (s.date, s.period, s.grade, s.class_num))
+
+    def subject_slots(self, subjects: List[str], grade: Optional[str] = None, class_num: Optional[str] = None,
+                      start: str = "", end: str = "9999") -> List[TimetableSlot]:
+        hits = [
+            s for subject in subjects for s in self._by_subject.get(subject, [])
+            if start <= s.date <= end and (grade is None or (s.grade == grade and s.class_num == class_num))
+        ]
+        return sorted(hits, key=lambda s: (s.date, s.period, s.grade, s.class_num))
@@ -0,0 +1,73 @@
+# 크롤러 산출물 감시: 수정 시각/크기를 주기적으로 확인해 바뀐 데이터만 다시 로드
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ai.core.telemetry import get_logger
+
+logger = get_logger("watcher")
+
+
+def file_snapshot(path: str) -> Optional[Tuple[int, int]]:
+    """파일의 (크기, 수정 시각). 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class DataWatcher:
+    """등록된 대상의 스냅샷이 바뀌면 백그라운드 스레드에서 콜백을 호출한다.
+
+    콜백이 False를 돌려주면(예: 크롤러가 아직 파일을 쓰는 중이라 JSON이 깨진 경우)
+    스냅샷을 갱신하지 않고 다음 주기에 다시 시도한다.
+    """
+
+    def __init__(self, interval: float = 30):
+        self.interval = interval
+        self._targets: List[Tuple[str, Callable[[], object], Callable[[], bool]]] = []
+        self._seen: Dict[str, object] = {}
+        self._periodic: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, name: str, snapshot: Callable[[], object], callback: Callable[[], bool]):
+        self._targets.append((name, snapshot, callback))
+        self._seen[name] = snapshot()
+
+    def every(self, callback: Callable[[], None]):
+        """변경 여부와 관계없이 매 주기마다 실행할 작업 등록 (예: 빌더 재선출)"""
+        self._periodic.append(callback)
+
+    def check(self):
+        """한 번 검사. 테스트나 수동 갱신에서 직접 호출할 수 있다."""
+        for callback in list(self._periodic):
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"주기 작업 실패: {e}")
+        for name, snapshot, callback in self._targets:
+            current = snapshot()
+            if current == self._seen.get(name):
+                continue
+            logger.info(f"{name} 변경 감지. 다시 로드합니다.")
+            try:
+                ok = callback()
+            except Exception as e:
+                logger.warning(f"{name} 다시 로드 실패: {e}")
+                ok = False
+            if ok is not False:
+                self._seen[name] = current
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -6,14 +6,23 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+import json
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List
+
 from pydantic import BaseModel
-from ai.core.engine import bot  # 절대 경로로 임포트하는 것이 가장 안전합니다.
+from ai.core.engine import get_bot  # 절대 경로로 임포트하는 것이 가장 안전합니다.
+from ai.core.telemetry import ERRORS, mark_worker_dead, metrics_payload
 
 class QuestionRequest(BaseModel):
     question: str
 
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
+
 app = FastAPI(root_path="/ai", openapi_url="/openapi.json", docs_url="/docs")
 
 app.add_middleware(
@@ -24,22 +33,125 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 엔진은 워커가 뜬 뒤 startup 훅에서 만든다 (PDF 파싱 풀이 이 모듈을 다시 임포트해도 엔진이 생기지 않도록)
+bot = None
+
+@app.on_event("startup")
+async def start_engine():
+    global bot
+    bot = get_bot()
+
+@app.on_event("shutdown")
+async def shutdown_metrics():
+    # 멀티 워커 지표 모드에서 종료한 워커의 게이지 값이 남지 않게 정리
+    mark_worker_dead()
+
 @app.get("/")
 async def root():
     return {"message": "D-ask AI 서버가 작동 중입니다."}
 
+@app.get("/health")
+async def health():
+    # 프로세스 생존 여부만 확인 (liveness)
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    # 급식/시간표가 올라오면 트래픽을 받을 수 있음. RAG 가능 여부는 capabilities로 따로 알려줌
+    capabilities = bot.status()
+    is_ready = capabilities["meal"] or capabilities["timetable"] or capabilities["rag"]
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "capabilities": capabilities},
+    )
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus 수집용: 단계별 지연 히스토그램, 라우팅/캐시/오류 카운터, 인덱스 진행률
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    # 답변 캐시 적중/미스 현황 (Gemini 호출 절감량 확인용)
+    return bot.answer_cache.stats()
+
+@app.get("/retrieval/stats")
+async def retrieval_stats():
+    # 질의별 검색 후보/컷 수 (VECTOR_K, SIMILARITY_THRESHOLD 튜닝용)
+    return bot.retrieval_stats.snapshot()
+
+@app.get("/summaries")
+async def list_summaries():
+    # 들여올 때 만들어 둔 공지/PDF 요약 목록 (최근 갱신 순)
+    return {"summaries": [_summary_view(d) for d in bot.summary_store.entries()]}
+
+@app.get("/summaries/{doc_id}")
+async def get_summary(doc_id: str):
+    record = bot.summary_store.get(doc_id)
+    if record is None:
+        return JSONResponse(status_code=404, content={"error": "요약을 찾을 수 없습니다."})
+    return _summary_view(record)
+
+def _summary_view(record: dict) -> dict:
+    return {k: record.get(k) for k in ("id", "source", "title", "link", "summary", "updated_at")}
+
 @app.post("/qna")
 async def rag_query_endpoint(request: QuestionRequest):
     if not request.question:
         return {"answer": "질문을 입력해 주세요."}
     
     try:
-        # engine.py의 bot.ask 실행
-        answer = bot.ask(request.question)
+        # engine.py의 bot.ask_async 실행 (Gemini 응답 대기 중에도 이벤트 루프를 막지 않음)
+        answer = await bot.ask_async(request.question)
         return {"answer": answer}
     except Exception as e:
+        ERRORS.labels(stage="qna").inc()
         return {"answer": f"서버 오류가 발생했습니다: {str(e)}"}
 
+@app.post("/qna/batch")
+async def rag_batch_endpoint(request: BatchQuestionRequest):
+    """여러 질문을 한 번에 처리 (FAQ 미리 만들기, 회귀 재생용). 답변은 입력 순서대로"""
+    limit = bot.settings.BATCH_MAX_QUESTIONS
+    if len(request.questions) > limit:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"한 번에 최대 {limit}개의 질문만 보낼 수 있습니다."},
+        )
+
+    try:
+        answers = await bot.ask_batch(request.questions)
+        return {"answers": answers}
+    except Exception as e:
+        ERRORS.labels(stage="qna_batch").inc()
+        return {"answers": [f"서버 오류가 발생했습니다: {str(e)}"] * len(request.questions)}
+
+def _sse(data: dict, event: str = None) -> str:
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
+@app.post("/qna/stream")
+async def rag_stream_endpoint(request: QuestionRequest):
+    """/qna와 같은 질문을 Server-Sent Events로 토큰 단위 스트리밍"""
+    async def event_stream():
+        if not request.question:
+            yield _sse({"token": "질문을 입력해 주세요."})
+            yield _sse({}, event="done")
+            return
+        try:
+            async for token in bot.ask_stream(request.question):
+                yield _sse({"token": token})
+        except Exception as e:
+            ERRORS.labels(stage="qna_stream").inc()
+            yield _sse({"error": f"서버 오류가 발생했습니다: {str(e)}"}, event="error")
+        yield _sse({}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     # host를 0.0.0.0으로 설정해야 외부(Docker나 다른 기기)에서도 접근 가능합니다.
@@ -0,0 +1,48 @@
+# 질문 분석기 표 기반 정답 코퍼스 (벤치마크 ai/benchmarks/bench_analyzer.py도 같은 코퍼스를 쓴다)
+import datetime
+
+import pytest
+
+from ai.utils.analyzer import analyze
+
+TODAY = datetime.date(2026, 3, 4)  # 수요일
+
+# (질문, 기대값) - 기대값에 적힌 필드만 비교
+CORPUS = [
+    ("오늘 급식 뭐야", {"intent": "meal", "date": "2026-03-04", "meal_slot": None}),
+    ("내일 점심 메뉴", {"intent": "meal", "date": "2026-03-05", "meal_slot": "중식"}),
+    ("모레 저녁밥", {"intent": "meal", "date": "2026-03-06", "meal_slot": "석식"}),
+    ("금요일 조식", {"intent": "meal", "date": "2026-03-06", "meal_slot": "조식"}),
+    ("월요일 급식", {"intent": "meal", "date": "2026-03-09"}),
+    ("3월 12일 석식", {"intent": "meal", "date": "2026-03-12", "meal_slot": "석식"}),
+    ("이번주 급식", {"intent": "meal", "date_range": ("2026-03-02", "2026-03-08")}),
+    ("다음주 화요일 급식", {"intent": "meal", "date": "2026-03-10", "date_range": ("2026-03-09", "2026-03-15")}),
+    ("1학년 4반 시간표", {"intent": "timetable", "grade": "1", "class_num": "4", "date": "2026-03-04"}),
+    ("2-3 내일 시간표", {"intent": "timetable", "grade": "2", "class_num": "3", "date": "2026-03-05"}),
+    ("3학년 1반 3교시 뭐야", {"intent": "timetable", "grade": "3", "class_num": "1", "period": 3}),
+    ("1/2 목요일 수업", {"intent": "timetable", "grade": "1", "class_num": "2", "date": "2026-03-05"}),
+    ("김철수 선생님 수업 언제야", {"intent": "timetable", "teacher": "김철수", "flags": ["when"], "date_explicit": False}),
+    ("내일 박영희쌤 몇 교시", {"intent": "timetable", "teacher": "박영희", "date": "2026-03-05", "date_explicit": True}),
+    ("수업 몇 시에 끝나?", {"intent": "timetable", "date": "2026-03-04"}),  # '수'가 요일로 잡히지 않아야 함
+    ("기숙사 벌점 규정 알려줘", {"intent": "general", "source_hints": ["pdf"]}),
+    ("DSM 인증제 기준", {"intent": "general", "source_hints": ["pdf"]}),
+    ("학교 축제 언제야", {"intent": "general", "source_hints": [], "flags": ["when"]}),
+    ("다음에 치킨 언제 나와?", {"intent": "general", "flags": ["when"]}),
+    ("오늘 점심 칼로리", {"intent": "meal", "meal_slot": "중식", "flags": ["calories"]}),
+    ("내일 급식 알레르기 정보", {"intent": "meal", "date": "2026-03-05", "flags": ["allergy"]}),
+    ("지금 몇 시야", {"intent": "general", "date": "2026-03-04"}),  # '금'이 요일로 잡히지 않아야 함
+    # 예전 코드의 이상 동작을 고쳐 고정한 사례
+    ("2026-03-05 급식", {"intent": "meal", "date": "2026-03-05", "date_explicit": True, "grade": None}),  # 예전: 6학년 0반
+    ("2026.3.12 석식", {"intent": "meal", "date": "2026-03-12", "meal_slot": "석식", "grade": None}),
+    ("3월 급식", {"intent": "meal", "date": "2026-03-04", "date_explicit": False}),  # 예전: '월'을 월요일로
+    ("010-1234-5678 연락처", {"intent": "general", "grade": None, "class_num": None}),  # 예전: 0학년 1반
+    # 의도적으로 예전 동작을 유지하는 사례
+    ("3월 32일 급식", {"intent": "meal", "date": "2026-03-04", "date_explicit": True}),  # 없는 날짜는 오늘
+    ("월 급식", {"intent": "meal", "date": "2026-03-09"}),  # 한 글자 요일
+]
+
+
+@pytest.mark.parametrize("question, expected", CORPUS, ids=[q for q, _ in CORPUS])
+def test_corpus(question, expected):
+    parsed = analyze(question, today=TODAY)
+    assert {name: getattr(parsed, name) for name in expected} == expected
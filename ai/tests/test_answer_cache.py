@@ -0,0 +1,52 @@
+# 답변 캐시가 범위(날짜/학년·반/숫자)가 다른 비슷한 질문에 엉뚱한 답을 돌려주지 않는지 확인
+import numpy as np
+import pytest
+
+from ai.benchmarks.bench_cache_threshold import NEAR_MISSES
+from ai.core.cache import AnswerCache, answer_scope
+from ai.utils.analyzer import analyze
+
+VECTOR = [1.0, 0.0, 0.0]
+
+
+def _set(cache, question, answer, vector=VECTOR):
+    cache.set(question, answer, embedding=vector, scope=answer_scope(analyze(question)))
+
+
+def _get(cache, question, vector=VECTOR):
+    return cache.get(question, embedding=vector, scope=answer_scope(analyze(question)))
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("1학년 1반 시간표", "1학년 2반 시간표"),
+    ("3월 5일 행사 뭐 있어", "3월 6일 행사 뭐 있어"),
+    ("학칙 제12조 내용", "학칙 제13조 내용"),
+    ("내일 점심 뭐야", "내일 저녁 뭐야"),
+])
+def test_different_scope_is_never_served(cached, asked):
+    # 임베딩이 완전히 같아도 범위가 다르면 미스
+    cache = AnswerCache(similarity=0.95)
+    _set(cache, cached, "답변")
+    assert answer_scope(analyze(cached)) != answer_scope(analyze(asked))
+    assert _get(cache, asked) is None
+
+
+def test_same_scope_paraphrase_is_served():
+    cache = AnswerCache(similarity=0.95)
+    _set(cache, "기숙사 귀가 신청 언제까지야", "목요일 오후 5시까지")
+    assert _get(cache, "기숙사 귀가 신청은 언제까지야?") == "목요일 오후 5시까지"
+
+
+def test_threshold_bounds_semantic_hits():
+    cache = AnswerCache(similarity=0.95)
+    _set(cache, "벌점 규정 알려줘", "벌점 규정")
+    near = [0.94, float(np.sqrt(1 - 0.94 ** 2)), 0.0]
+    close = [0.96, float(np.sqrt(1 - 0.96 ** 2)), 0.0]
+    assert _get(cache, "상점 규정 알려줘", near) is None
+    assert _get(cache, "벌점 규정이 어떻게 돼", close) == "벌점 규정"
+
+
+def test_near_miss_corpus_is_scoped_or_left_to_threshold():
+    # 슬롯이 다른 쌍은 범위로 갈리고, 나머지(벌점/상점 등)는 bench_cache_threshold가 실제 임베딩으로 점검한다
+    scoped = [a for a, b in NEAR_MISSES if answer_scope(analyze(a)) != answer_scope(analyze(b))]
+    assert {"1학년 1반 시간표", "3월 5일 행사 뭐 있어", "학칙 제12조 내용"} <= set(scoped)
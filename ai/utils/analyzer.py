@@ -0,0 +1,145 @@
+# 질문 분석기: 정규식 한 번의 스캔으로 의도/날짜/학년반/끼니/출처 힌트를 모두 추출
+import datetime
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+MEAL_KEYWORDS = ("급식", "밥", "메뉴", "석식", "중식", "조식")
+TIMETABLE_KEYWORDS = ("시간표", "교시", "수업")
+PDF_KEYWORDS = ("인증제", "dsm", "기숙사", "우정관", "벌점", "상점", "규정")
+MEAL_SLOTS = {"아침": "조식", "조식": "조식", "점심": "중식", "중식": "중식", "저녁": "석식", "석식": "석식"}
+WEEKDAYS = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
+RELATIVE_DAYS = {"어제": -1, "오늘": 0, "내일": 1, "모레": 2}
+RELATIVE_WEEKS = {"지난": -1, "이번": 0, "다음": 1}
+FLAG_KEYWORDS = {"언제": "when", "칼로리": "calories", "열량": "calories", "알레르기": "allergy", "알러지": "allergy"}
+
+_KEYWORDS = sorted(set(MEAL_KEYWORDS + TIMETABLE_KEYWORDS + PDF_KEYWORDS) | set(MEAL_SLOTS) | set(FLAG_KEYWORDS), key=len, reverse=True)
+
+# 패턴이 시작될 수 있는 첫 글자. 나머지 위치는 분기를 하나씩 시도하지 않고 바로 건너뛴다
+_FIRST_CHARS = set("0123456789" "지이다" "월화수목금토일" "어오내모") | {k[0] for k in _KEYWORDS} | {k[0].upper() for k in _KEYWORDS}
+
+# 대안 순서가 곧 우선순위 (같은 위치에서는 앞쪽 패턴이 먼저 잡힘).
+# 영문 키워드(dsm)만 대소문자를 무시하고, 나머지는 IGNORECASE 없이 비교해 스캔 비용을 줄인다
+_PATTERN = re.compile(
+    r"(?=[" + "".join(sorted(_FIRST_CHARS)) + r"])(?:"
+    r"(?P<iso>(?P<iso_y>\d{4})[-./](?P<iso_m>\d{1,2})[-./](?P<iso_d>\d{1,2}))"
+    r"|(?P<gc>(?P<gc_g>\d)\s*학년\s*(?P<gc_c>\d)\s*반)"
+    r"|(?P<md>(?P<md_m>\d{1,2})\s*월\s*(?P<md_d>\d{1,2})\s*일)"
+    r"|(?P<gc2>(?<!\d)(?P<gc2_g>\d)[/-](?P<gc2_c>\d)(?!\d))"
+    r"|(?P<period>(?P<period_n>\d{1,2})\s*교시)"
+    r"|(?P<week>(?P<week_rel>지난|이번|다음)\s*주)"
+    r"|(?P<wd>(?P<wd_name>[월화수목금토일])요일)"
+    r"|(?P<wd_short>(?<![가-힣\d])[월화수목금](?![가-힣]))"
+    r"|(?P<rel>어제|오늘|내일|모레)"
+    r"|(?P<kw>" + "|".join(f"(?i:{re.escape(k)})" if k.isascii() else re.escape(k) for k in _KEYWORDS) + r"))"
+)
+# 'OO 선생님/쌤'은 모든 한글 위치에서 시도하면 비싸므로, 호칭이 있을 때만 따로 찾는다
+_TEACHER_PATTERN = re.compile(r"([가-힣]{2,4}?)\s*(?:선생님|쌤)")
+
+
+@dataclass
+class ParsedQuery:
+    question: str
+    intent: str = "general"  # 대표 의도: meal > timetable > general
+    intents: List[str] = field(default_factory=list)
+    date: str = ""  # YYYY-MM-DD
+    date_range: Optional[Tuple[str, str]] = None  # 주 단위 질문일 때 (월요일, 일요일)
+    date_explicit: bool = False  # 질문에 날짜 표현이 있었는지 (없으면 date는 오늘)
+    grade: Optional[str] = None
+    class_num: Optional[str] = None
+    period: Optional[int] = None
+    teacher: Optional[str] = None  # '김OO 선생님'의 이름 부분
+    meal_slot: Optional[str] = None  # 조식 / 중식 / 석식
+    source_hints: List[str] = field(default_factory=list)  # "pdf" 등 우선 탐색할 출처
+    flags: List[str] = field(default_factory=list)  # "when"(언제), "calories", "allergy"
+
+
+def _fmt(day: datetime.date) -> str:
+    return day.isoformat()  # YYYY-MM-DD. strftime보다 몇 배 빠름 (질문마다 호출됨)
+
+
+def analyze(question: str, today: Optional[datetime.date] = None) -> ParsedQuery:
+    """질문을 한 번만 훑어 구조화된 질의로 변환"""
+    today = today or datetime.date.today()
+    result = ParsedQuery(question=question)
+    weekday = None
+    day_offset = None
+    month_day = None
+    full_date = None
+    week_offset = None
+
+    for match in _PATTERN.finditer(question):
+        kind = match.lastgroup  # 바깥쪽 그룹이 가장 늦게 닫히므로 항상 최상위 패턴 이름
+        if kind == "gc" and result.grade is None:
+            result.grade, result.class_num = match.group("gc_g"), match.group("gc_c")
+        elif kind == "gc2" and result.grade is None:
+            result.grade, result.class_num = match.group("gc2_g"), match.group("gc2_c")
+        elif kind == "iso" and full_date is None:
+            full_date = (int(match.group("iso_y")), int(match.group("iso_m")), int(match.group("iso_d")))
+        elif kind == "md" and month_day is None:
+            month_day = (int(match.group("md_m")), int(match.group("md_d")))
+        elif kind == "period" and result.period is None:
+            result.period = int(match.group("period_n"))
+            if "timetable" not in result.intents:
+                result.intents.append("timetable")
+        elif kind == "week" and week_offset is None:
+            week_offset = RELATIVE_WEEKS[match.group("week_rel")]
+        elif kind == "wd" and weekday is None:
+            weekday = WEEKDAYS[match.group("wd_name")]
+        elif kind == "wd_short" and weekday is None:
+            weekday = WEEKDAYS[match.group("wd_short")]
+        elif kind == "rel" and day_offset is None:
+            day_offset = RELATIVE_DAYS[match.group("rel")]
+        elif kind == "kw":
+            word = match.group("kw").lower()
+            if word in MEAL_SLOTS and result.meal_slot is None:
+                result.meal_slot = MEAL_SLOTS[word]
+            if word in MEAL_KEYWORDS and "meal" not in result.intents:
+                result.intents.append("meal")
+            if word in TIMETABLE_KEYWORDS and "timetable" not in result.intents:
+                result.intents.append("timetable")
+            if word in PDF_KEYWORDS and "pdf" not in result.source_hints:
+                result.source_hints.append("pdf")
+            if word in FLAG_KEYWORDS and FLAG_KEYWORDS[word] not in result.flags:
+                result.flags.append(FLAG_KEYWORDS[word])
+
+    # 이름만으로는 의도를 정하지 않는다 ('사감 선생님'처럼 시간표에 없는 호칭도 잡히므로).
+    # 시간표 데이터의 선생님인지는 엔진이 확인한다
+    if "선생님" in question or "쌤" in question:
+        teacher = _TEACHER_PATTERN.search(question)
+        if teacher:
+            result.teacher = teacher.group(1)
+
+    # 칼로리/알레르기는 급식에만 있는 정보이므로 급식 질문으로 본다
+    if ("calories" in result.flags or "allergy" in result.flags) and "meal" not in result.intents:
+        result.intents.append("meal")
+
+    if "meal" in result.intents:
+        result.intent = "meal"
+    elif "timetable" in result.intents:
+        result.intent = "timetable"
+
+    # 날짜 결정: 요일 > 상대일 > 연-월-일 > 월/일 > 오늘 (기존 extract_date 우선순위 유지)
+    if week_offset is not None:
+        monday = today - datetime.timedelta(days=today.weekday()) + datetime.timedelta(weeks=week_offset)
+        result.date_range = (_fmt(monday), _fmt(monday + datetime.timedelta(days=6)))
+        if weekday is not None:
+            target = monday + datetime.timedelta(days=weekday)
+        else:
+            target = today if week_offset == 0 else monday
+    elif weekday is not None:
+        target = today + datetime.timedelta(days=(weekday - today.weekday() + 7) % 7)
+    elif day_offset is not None:
+        target = today + datetime.timedelta(days=day_offset)
+    elif full_date is not None or month_day is not None:
+        try:
+            target = datetime.date(*full_date) if full_date else datetime.date(today.year, *month_day)
+        except ValueError:
+            target = today
+    else:
+        target = today
+    result.date = _fmt(target)
+    result.date_explicit = not (
+        week_offset is None and weekday is None and day_offset is None and month_day is None and full_date is None
+    )
+    return result
@@ -1,11 +1,17 @@
+import base64
+import binascii
 import logging
+from datetime import datetime
+from typing import Optional
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from google import genai
-from backend.database import get_db
+from backend.database import SessionLocal, get_db
 from backend.models import Chatroom, Message
 from backend.login import get_user_info_internal
+from backend.title_worker import TitleWorker
 import os
 from dotenv import load_dotenv
 
@@ -25,6 +31,10 @@ client = genai.Client(api_key=api_key)
 router = APIRouter(prefix="/chat")
 MAX_HISTORY = 20
 DEFAULT_TITLE = "새 채팅"
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_PAGE_MAX = 200
+CHAT_PAGE_SIZE = 20
+CHAT_PAGE_MAX = 100
 
 
 class UpdateChatRequest(BaseModel):
@@ -40,30 +50,53 @@ def build_gemini_contents(chat_messages: list) -> list:
     return contents
 
 
-def generate_ai_title(chat_id: str, content: str):
+def generate_ai_title(content: str) -> str:
     # content에는 유저의 첫 질문이 전달되어야 합니다.
     prompt = f"다음 문장을 요약해서 아주 짧은 채팅방 제목을 만들어줘(최대 10자, 특수문자 제외): {content}"
-    
+    response = client.models.generate_content(
+        model="models/gemini-2.5-flash",
+        contents=prompt
+    )
+    new_title = (response.text or "").strip()
+    if not new_title:
+        raise ValueError("빈 제목 응답")
+    return new_title
+
+
+def save_ai_title(chat_id: str, title: str):
+    # 워커 스레드에서 실행되므로 요청과 별도의 DB 세션을 쓴다
+    db = SessionLocal()
     try:
-        # 모델명을 현재 사용 가능한 버전으로 변S경
-        response = client.models.generate_content(
-            model="models/gemini-2.5-flash",
-            contents=prompt
-        )
-        
-        new_title = response.text.strip()
-        
-        # 새로운 DB 세션을 열어서 업데이트 (기존 방식 유지 시)
-        from backend.database import SessionLocal
-        db = SessionLocal()
         chat = db.query(Chatroom).filter(Chatroom.id == chat_id).first()
-        if chat:
-            chat.title = new_title
+        # 그 사이 제목이 바뀌었으면(사용자 수정 등) 덮어쓰지 않음
+        if chat and chat.title == DEFAULT_TITLE:
+            chat.title = title
             db.commit()
-            logger.info(f"제목 업데이트 성공: {new_title}")
+    finally:
         db.close()
-    except Exception as e:
-        logger.error(f"제목 생성 실패: {str(e)}")
+
+
+title_worker = TitleWorker(
+    generate_ai_title,
+    save_ai_title,
+    workers=int(os.getenv("TITLE_WORKERS", "2")),
+    max_retries=int(os.getenv("TITLE_MAX_RETRIES", "3")),
+)
+
+
+def _encode_cursor(created: datetime, row_id: str) -> str:
+    """(시각, id) 키셋을 클라이언트에 넘길 불투명한 커서 문자열로"""
+    raw = f"{created.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created), row_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="잘못된 커서")
 
 
 def authenticate_user(provider: str, authorization: str, db: Session):
@@ -90,27 +123,97 @@ def create_chats(
 @router.get("/read_chat")
 def get_chats(
     provider: str = Query(...),
+    limit: Optional[int] = Query(None, ge=1, le=CHAT_PAGE_MAX),
+    cursor: Optional[str] = Query(None),
     authorization: str = Header(...),
     db: Session = Depends(get_db),
 ):
     user_info = authenticate_user(provider, authorization, db)
-    chats = db.query(Chatroom).filter(Chatroom.id2 == user_info["user_id"]).all()
-    return [{"title": c.title, "id": c.id} for c in chats]
+    query = db.query(Chatroom).filter(Chatroom.id2 == user_info["user_id"])
+    # limit/cursor 없이 부르는 기존 클라이언트에는 예전처럼 전체 목록(배열)을 돌려준다
+    if limit is None and cursor is None:
+        return [{"title": c.title, "id": c.id} for c in query.all()]
+
+    # 최근 대화가 있는 채팅방부터. 다음 페이지는 next_cursor를 cursor로 넘긴다
+    limit = limit or CHAT_PAGE_SIZE
+    if cursor:
+        updated, chat_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Chatroom.updated_at < updated,
+            and_(Chatroom.updated_at == updated, Chatroom.id < chat_id),
+        ))
+    chats = query.order_by(Chatroom.updated_at.desc(), Chatroom.id.desc()).limit(limit + 1).all()
+
+    has_more = len(chats) > limit
+    chats = chats[:limit]
+    next_cursor = _encode_cursor(chats[-1].updated_at, chats[-1].id) if has_more else None
+    return {
+        "chats": [{"title": c.title, "id": c.id, "updated_at": c.updated_at.isoformat()} for c in chats],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/read_message/{chat_id}")
 def get_chat_messages(
     chat_id: str,
     provider: str = Query(...),
+    limit: Optional[int] = Query(None, ge=1, le=MESSAGE_PAGE_MAX),
+    before: Optional[str] = Query(None),
+    after: Optional[str] = Query(None),
     authorization: str = Header(...),
     db: Session = Depends(get_db),
 ):
+    """(created_at, id) 키셋 페이지. limit만 넘기면 가장 최근 페이지를 준다.
+
+    limit/before/after를 하나도 넘기지 않으면 기존 클라이언트 호환을 위해 전체 메시지 배열을 돌려준다.
+
+    OFFSET 대신 마지막으로 본 메시지를 기준으로 잘라서, 그 사이 새 메시지가 추가돼도
+    페이지가 밀리거나 겹치지 않고 채팅방 크기와 관계없이 인덱스 범위만 읽는다.
+    메시지는 항상 시간순으로 돌려주며, 이전 페이지는 prev_cursor를 before로,
+    이후 페이지는 next_cursor를 after로 넘겨 가져온다.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="before와 after는 함께 쓸 수 없음")
     user_info = authenticate_user(provider, authorization, db)
     chat = db.query(Chatroom).filter(Chatroom.id == chat_id, Chatroom.id2 == user_info["user_id"]).first()
     if not chat:
         raise HTTPException(status_code=404, detail="존재하지 않는 채팅방")
-    messages = db.query(Message).filter(Message.room_id == chat_id).order_by(Message.created_at).all()
-    return [{"message_id": m.id, "content": m.content, "role": m.role} for m in messages]
+
+    query = db.query(Message).filter(Message.room_id == chat_id)
+    if limit is None and before is None and after is None:
+        messages = query.order_by(Message.created_at, Message.id).all()
+        return [{"message_id": m.id, "content": m.content, "role": m.role} for m in messages]
+
+    limit = limit or MESSAGE_PAGE_SIZE
+    if after:
+        created, message_id = _decode_cursor(after)
+        query = query.filter(or_(
+            Message.created_at > created,
+            and_(Message.created_at == created, Message.id > message_id),
+        ))
+        messages = query.order_by(Message.created_at, Message.id).limit(limit + 1).all()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+    else:
+        if before:
+            created, message_id = _decode_cursor(before)
+            query = query.filter(or_(
+                Message.created_at < created,
+                and_(Message.created_at == created, Message.id < message_id),
+            ))
+        # 최신부터 역순으로 읽고 시간순으로 뒤집는다
+        messages = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1).all()
+        has_more = len(messages) > limit
+        messages = messages[:limit][::-1]
+
+    # has_more는 요청한 방향(before/기본: 과거, after: 이후)으로 더 있는지.
+    # 최신 페이지의 next_cursor를 after로 넘기면 새로 추가된 메시지만 받아올 수 있다
+    return {
+        "messages": [{"message_id": m.id, "content": m.content, "role": m.role} for m in messages],
+        "prev_cursor": _encode_cursor(messages[0].created_at, messages[0].id) if messages else None,
+        "next_cursor": _encode_cursor(messages[-1].created_at, messages[-1].id) if messages else None,
+        "has_more": has_more,
+    }
 
 
 @router.post("/update/{chat_id}")
@@ -129,13 +232,29 @@ def update_chat(
 
     msg = Message(room_id=chat_id, role=payload.role, content=payload.message)
     db.add(msg)
+    chat.updated_at = datetime.utcnow()  # 채팅방 목록의 최근 대화순 정렬 기준
     db.commit()
 
+    # 제목은 백그라운드에서 만들고 바로 기본 제목을 돌려준다. 클라이언트는 /chat/title/{chat_id}로 확인
+    title_pending = False
     if chat.title == DEFAULT_TITLE and payload.role == "user":
-        generate_ai_title(chat.id, payload.message)
-        db.refresh(chat) # 변경된 제목 반영
+        title_pending = title_worker.submit(chat.id, payload.message)
+
+    return {"title": chat.title, "title_pending": title_pending}
 
-    return {"title": chat.title}
+
+@router.get("/title/{chat_id}")
+def get_chat_title(
+    chat_id: str,
+    provider: str = Query(...),
+    authorization: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    user_info = authenticate_user(provider, authorization, db)
+    chat = db.query(Chatroom).filter(Chatroom.id == chat_id, Chatroom.id2 == user_info["user_id"]).first()
+    if not chat:
+        raise HTTPException(status_code=404, detail="존재하지 않는 채팅방")
+    return {"title": chat.title, "title_pending": title_worker.is_pending(chat.id)}
 
 @router.delete("/delete/{chat_id}")
 def delete_chat(
@@ -0,0 +1,106 @@
+# OAuth provider 호출용 공유 HTTP 클라이언트: provider별 커넥션 풀(keep-alive), 타임아웃, 재시도 정책
+import asyncio
+import os
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.getenv("OAUTH_POOL_SIZE", "10"))  # provider별 최대 동시 연결 수
+CONNECT_TIMEOUT = float(os.getenv("OAUTH_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("OAUTH_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("OAUTH_MAX_RETRIES", "2"))
+
+# GET(userinfo)만 응답 오류에도 재시도. POST(코드 교환/리프레시)는 요청이 나가기 전 연결 실패일 때만 재시도
+# (인가 코드는 한 번만 쓸 수 있으므로 응답을 못 받은 POST를 다시 보내면 안 된다)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_FACTOR = 0.2
+
+_RETRY = Retry(
+    total=MAX_RETRIES,
+    connect=MAX_RETRIES,
+    read=MAX_RETRIES,
+    status=MAX_RETRIES,
+    backoff_factor=BACKOFF_FACTOR,
+    status_forcelist=RETRY_STATUSES,
+    allowed_methods=frozenset({"GET"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+class _PooledSession(requests.Session):
+    """timeout을 지정하지 않은 호출에도 기본 타임아웃을 적용하는 세션"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+class _RetryingTransport(httpx.AsyncHTTPTransport):
+    """_RETRY와 같은 정책의 async transport: 연결 실패는 모든 메서드, 429/5xx 응답은 GET만 재시도"""
+
+    async def handle_async_request(self, request):
+        for attempt in range(MAX_RETRIES + 1):
+            response = await super().handle_async_request(request)
+            if request.method != "GET" or response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            await response.aclose()
+            await asyncio.sleep(float(retry_after) if retry_after.isdigit() else BACKOFF_FACTOR * (2 ** attempt))
+        return response
+
+
+_sessions = {}
+_async_clients = {}
+_lock = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    session = _PooledSession()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, pool_block=True, max_retries=_RETRY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)  # 로컬 스텁 OAuth 서버 테스트용
+    return session
+
+
+def oauth_session(provider: str) -> requests.Session:
+    """provider별로 하나씩 만들어 재사용하는 requests 세션 (TLS 연결을 유지해 핸드셰이크를 한 번만 한다)"""
+    session = _sessions.get(provider)
+    if session is None:
+        with _lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = _sessions[provider] = _new_session()
+    return session
+
+
+def async_oauth_client(provider: str) -> httpx.AsyncClient:
+    """async 엔드포인트용 provider별 httpx.AsyncClient. oauth_session과 같은 타임아웃/풀 크기/재시도 정책"""
+    client = _async_clients.get(provider)
+    if client is None or client.is_closed:
+        client = _async_clients[provider] = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            # transport를 직접 넘기면 클라이언트의 limits는 무시되므로 transport에 지정
+            transport=_RetryingTransport(
+                retries=MAX_RETRIES,  # 연결 실패 재시도
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            ),
+        )
+    return client
+
+
+def close_all():
+    """서버 종료 시 풀의 연결을 정리"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+async def aclose_all():
+    for client in list(_async_clients.values()):
+        await client.aclose()
+    _async_clients.clear()
@@ -4,7 +4,6 @@ import base64
 from urllib.parse import urlencode
 
 import dotenv
-import requests
 from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse, JSONResponse
@@ -13,6 +12,8 @@ from sqlalchemy.orm import Session
 
 from backend.models import User
 from backend.database import SessionLocal, get_db
+from backend.http_client import oauth_session
+from backend.token_cache import token_cache
 
 # .env 로드
 dotenv.load_dotenv()
@@ -21,25 +22,25 @@ dotenv.load_dotenv()
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "https://d-ask.duckdns.org/api/auth/google/callback")
-GOOGLE_AUTH_ENDPOINT = "https://accounts.google.com/o/oauth2/v2/auth"
-GOOGLE_TOKEN_ENDPOINT = "https://oauth2.googleapis.com/token"
-GOOGLE_USERINFO_ENDPOINT = "https://openidconnect.googleapis.com/v1/userinfo"
+GOOGLE_AUTH_ENDPOINT = os.getenv("GOOGLE_AUTH_ENDPOINT", "https://accounts.google.com/o/oauth2/v2/auth")
+GOOGLE_TOKEN_ENDPOINT = os.getenv("GOOGLE_TOKEN_ENDPOINT", "https://oauth2.googleapis.com/token")
+GOOGLE_USERINFO_ENDPOINT = os.getenv("GOOGLE_USERINFO_ENDPOINT", "https://openidconnect.googleapis.com/v1/userinfo")
 
 # Naver OAuth 설정
 NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
 NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
 NAVER_REDIRECT_URI = os.getenv("NAVER_REDIRECT_URI", "https://d-ask.duckdns.org/api/auth/naver/callback")
-NAVER_AUTH_ENDPOINT = "https://nid.naver.com/oauth2.0/authorize"
-NAVER_TOKEN_ENDPOINT = "https://nid.naver.com/oauth2.0/token"
-NAVER_USERINFO_ENDPOINT = "https://openapi.naver.com/v1/nid/me"
+NAVER_AUTH_ENDPOINT = os.getenv("NAVER_AUTH_ENDPOINT", "https://nid.naver.com/oauth2.0/authorize")
+NAVER_TOKEN_ENDPOINT = os.getenv("NAVER_TOKEN_ENDPOINT", "https://nid.naver.com/oauth2.0/token")
+NAVER_USERINFO_ENDPOINT = os.getenv("NAVER_USERINFO_ENDPOINT", "https://openapi.naver.com/v1/nid/me")
 
 # Kakao OAuth 설정
 KAKAO_CLIENT_ID = os.getenv("KAKAO_CLIENT_ID")
 KAKAO_CLIENT_SECRET = os.getenv("KAKAO_CLIENT_SECRET")
 KAKAO_REDIRECT_URI = os.getenv("KAKAO_REDIRECT_URI", "https://d-ask.duckdns.org/api/auth/kakao/callback")
-KAKAO_AUTH_ENDPOINT = "https://kauth.kakao.com/oauth/authorize"
-KAKAO_TOKEN_ENDPOINT = "https://kauth.kakao.com/oauth/token"
-KAKAO_USERINFO_ENDPOINT = "https://kapi.kakao.com/v2/user/me"
+KAKAO_AUTH_ENDPOINT = os.getenv("KAKAO_AUTH_ENDPOINT", "https://kauth.kakao.com/oauth/authorize")
+KAKAO_TOKEN_ENDPOINT = os.getenv("KAKAO_TOKEN_ENDPOINT", "https://kauth.kakao.com/oauth/token")
+KAKAO_USERINFO_ENDPOINT = os.getenv("KAKAO_USERINFO_ENDPOINT", "https://kapi.kakao.com/v2/user/me")
 
 app = FastAPI()
 router = APIRouter()
@@ -160,7 +161,7 @@ def google_callback(code: str | None = None, state: str | None = None, db: Sessi
         "grant_type": "authorization_code",
     }
 
-    token_resp = requests.post(
+    token_resp = oauth_session("google").post(
         GOOGLE_TOKEN_ENDPOINT,
         data=token_data,
         headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -176,7 +177,7 @@ def google_callback(code: str | None = None, state: str | None = None, db: Sessi
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="access_token 없음")
 
 
-    userinfo_resp = requests.get(
+    userinfo_resp = oauth_session("google").get(
         GOOGLE_USERINFO_ENDPOINT,
         headers={"Authorization": f"Bearer {access_token}"},
         timeout=10,
@@ -216,7 +217,7 @@ def naver_callback(code: str | None = None, state: str | None = None, db: Sessio
         "state": state,
     }
 
-    token_resp = requests.post(
+    token_resp = oauth_session("naver").post(
         NAVER_TOKEN_ENDPOINT,
         data=token_data,
         headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -232,7 +233,7 @@ def naver_callback(code: str | None = None, state: str | None = None, db: Sessio
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="access_token 없음")
 
 
-    userinfo_resp = requests.get(
+    userinfo_resp = oauth_session("naver").get(
         NAVER_USERINFO_ENDPOINT,
         headers={"Authorization": f"Bearer {access_token}"},
         timeout=10,
@@ -275,7 +276,7 @@ def kakao_callback(code: str | None = None, state: str | None = None, db: Sessio
         "code": code,
     }
 
-    token_resp = requests.post(
+    token_resp = oauth_session("kakao").post(
         KAKAO_TOKEN_ENDPOINT,
         data=token_data,
         headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -291,7 +292,7 @@ def kakao_callback(code: str | None = None, state: str | None = None, db: Sessio
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="access_token 없음")
 
 
-    userinfo_resp = requests.get(
+    userinfo_resp = oauth_session("kakao").get(
         KAKAO_USERINFO_ENDPOINT,
         headers={"Authorization": f"Bearer {access_token}"},
         timeout=10,
@@ -333,25 +334,61 @@ def get_user_info_internal(provider: str, authorization: str, db: Session):
     if not access_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="토큰 형식이 잘못됨")
 
+    # 이미 확인한 토큰이면 provider API/DB 조회 없이 메모리에서 바로 응답
+    user = token_cache.get_user(provider, access_token)
+    if user is not None:
+        return dict(user, access_token=access_token, refresh_token=refresh_token)
+    failure = token_cache.get_failure(provider, access_token, refresh_token)
+    if failure is not None:
+        raise HTTPException(status_code=failure[0], detail=failure[1])
+
+    try:
+        result = _verify_tokens(provider, access_token, refresh_token, db)
+    except HTTPException as e:
+        # 잘못된/만료된 토큰(401)으로 반복 요청해도 잠시 동안은 외부 호출을 하지 않는다.
+        # 502 등 provider 장애/리프레시 실패는 기억하지 않는다 (일시 오류로 정상 사용자가 막히지 않게)
+        if e.status_code == status.HTTP_401_UNAUTHORIZED:
+            token_cache.set_failure(provider, access_token, refresh_token, e.status_code, e.detail)
+        raise
+
+    if result["access_token"] != access_token:
+        token_cache.invalidate(provider, access_token)
+    token_cache.set_user(
+        provider,
+        result["access_token"],
+        {"user_id": result["user_id"], "email": result["email"], "provider": provider},
+    )
+    return result
+
+
+def _verify_tokens(provider: str, access_token: str, refresh_token: str | None, db: Session):
+    """provider의 userinfo API로 토큰을 확인하고, 만료됐으면 리프레시 토큰으로 갱신해 다시 확인한다"""
+
+    def check_upstream(resp):
+        # provider 장애(5xx/429)는 토큰 만료(401)와 구분해 502로 돌려준다 (실패 캐시에 남지 않게)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"{label} 사용자 정보 조회 실패")
+
     def parse_google_userinfo(token: str):
-        resp = requests.get(
+        resp = oauth_session("google").get(
             GOOGLE_USERINFO_ENDPOINT,
             headers={"Authorization": f"Bearer {token}"},
             timeout=10,
         )
+        check_upstream(resp)
         if resp.status_code != 200:
             return None
         data = resp.json()
         return data.get("email")
 
-    def refresh_google_tokens():
+    def refresh_google_tokens(token: str):
         refresh_data = {
             "client_id": GOOGLE_CLIENT_ID,
             "client_secret": GOOGLE_CLIENT_SECRET,
-            "refresh_token": refresh_token,
+            "refresh_token": token,
             "grant_type": "refresh_token",
         }
-        resp = requests.post(
+        resp = oauth_session("google").post(
             GOOGLE_TOKEN_ENDPOINT,
             data=refresh_data,
             headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -362,24 +399,25 @@ def get_user_info_internal(provider: str, authorization: str, db: Session):
         return resp.json()
 
     def parse_naver_userinfo(token: str):
-        resp = requests.get(
+        resp = oauth_session("naver").get(
             NAVER_USERINFO_ENDPOINT,
             headers={"Authorization": f"Bearer {token}"},
             timeout=10,
         )
+        check_upstream(resp)
         if resp.status_code != 200:
             return None
         data = resp.json()
         return data.get("response", {}).get("email")
 
-    def refresh_naver_tokens():
+    def refresh_naver_tokens(token: str):
         refresh_data = {
             "grant_type": "refresh_token",
             "client_id": NAVER_CLIENT_ID,
             "client_secret": NAVER_CLIENT_SECRET,
-            "refresh_token": refresh_token,
+            "refresh_token": token,
         }
-        resp = requests.post(
+        resp = oauth_session("naver").post(
             NAVER_TOKEN_ENDPOINT,
             data=refresh_data,
             headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -390,24 +428,25 @@ def get_user_info_internal(provider: str, authorization: str, db: Session):
         return resp.json()
 
     def parse_kakao_userinfo(token: str):
-        resp = requests.get(
+        resp = oauth_session("kakao").get(
             KAKAO_USERINFO_ENDPOINT,
             headers={"Authorization": f"Bearer {token}"},
             timeout=10,
         )
+        check_upstream(resp)
         if resp.status_code != 200:
             return None
         return resp.json().get("kakao_account", {}).get("email")
 
-    def refresh_kakao_tokens():
+    def refresh_kakao_tokens(token: str):
         data = {
             "grant_type": "refresh_token",
             "client_id": KAKAO_CLIENT_ID,
-            "refresh_token": refresh_token,
+            "refresh_token": token,
         }
         if KAKAO_CLIENT_SECRET:
             data["client_secret"] = KAKAO_CLIENT_SECRET
-        resp = requests.post(
+        resp = oauth_session("kakao").post(
             KAKAO_TOKEN_ENDPOINT,
             data=data,
             headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -434,78 +473,37 @@ def get_user_info_internal(provider: str, authorization: str, db: Session):
     if provider == "google":
         require_env(GOOGLE_CLIENT_ID, "GOOGLE_CLIENT_ID")
         require_env(GOOGLE_CLIENT_SECRET, "GOOGLE_CLIENT_SECRET")
-        email = parse_google_userinfo(access_token)
-        if email:
-            return make_user_response(email, access_token, refresh_token)
-        new_tokens = refresh_google_tokens()
-        if not new_tokens:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="토큰 리프레시 실패")
-        new_access = new_tokens.get("access_token")
-        new_refresh = new_tokens.get("refresh_token") or refresh_token
-        if not new_access:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="새 access_token 없음")
-        email = parse_google_userinfo(new_access)
-        if not email:
-            if not refresh_token:
-                raise HTTPException(status_code=401, detail="액세스 토큰 만료 및 리프레시 토큰 없음")
-            new_tokens = refresh_google_tokens(refresh_token)
-
-    if provider == "naver":
+        parse_userinfo, refresh_tokens, label = parse_google_userinfo, refresh_google_tokens, "Google"
+    elif provider == "naver":
         require_env(NAVER_CLIENT_ID, "NAVER_CLIENT_ID")
         require_env(NAVER_CLIENT_SECRET, "NAVER_CLIENT_SECRET")
-        
-        email = parse_naver_userinfo(access_token)
-        if email:
-            return make_user_response(email, access_token, refresh_token)
-        
-        if not refresh_token:
-            raise HTTPException(status_code=401, detail="Naver 인증 만료 및 리프레시 토큰 없음")
-            
-        new_tokens = refresh_naver_tokens(refresh_token) # 인자 전달 확인 필요
-        if not new_tokens:
-            raise HTTPException(status_code=502, detail="Naver 토큰 리프레시 실패")
-            
-        new_access = new_tokens.get("access_token")
-        new_refresh = new_tokens.get("refresh_token") or refresh_token
-        
-        if not new_access:
-            raise HTTPException(status_code=502, detail="새 access_token 없음")
-            
-        email = parse_naver_userinfo(new_access)
-        if not email:
-            raise HTTPException(status_code=502, detail="Naver 이메일 없음")
-        return make_user_response(email, new_access, new_refresh)
-
-    if provider == "kakao":
+        parse_userinfo, refresh_tokens, label = parse_naver_userinfo, refresh_naver_tokens, "Naver"
+    else:
         require_env(KAKAO_CLIENT_ID, "KAKAO_CLIENT_ID")
         require_env(KAKAO_CLIENT_SECRET, "KAKAO_CLIENT_SECRET")
-        
-        email = parse_kakao_userinfo(access_token)
-        if email:
-            return make_user_response(email, access_token, refresh_token)
-        
-        if not refresh_token:
-            raise HTTPException(
-                status_code=401, 
-                detail="카카오 인증 만료 및 리프레시 토큰 없음"
-            )
-            
-        new_tokens = refresh_kakao_tokens(refresh_token) 
-        
-        if not new_tokens:
-            raise HTTPException(status_code=502, detail="카카오 토큰 리프레시 실패")
-            
-        new_access = new_tokens.get("access_token")
-        new_refresh = new_tokens.get("refresh_token") or refresh_token
-        
-        if not new_access:
-            raise HTTPException(status_code=502, detail="새 카카오 access_token 없음")
-            
-        email = parse_kakao_userinfo(new_access)
-        if not email:
-            raise HTTPException(status_code=502, detail="카카오 이메일 없음")
-            
-        return make_user_response(email, new_access, new_refresh)
+        parse_userinfo, refresh_tokens, label = parse_kakao_userinfo, refresh_kakao_tokens, "카카오"
+
+    email = parse_userinfo(access_token)
+    if email:
+        return make_user_response(email, access_token, refresh_token)
+
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail=f"{label} 인증 만료 및 리프레시 토큰 없음")
+
+    new_tokens = refresh_tokens(refresh_token)
+    if not new_tokens:
+        raise HTTPException(status_code=502, detail=f"{label} 토큰 리프레시 실패")
+
+    new_access = new_tokens.get("access_token")
+    new_refresh = new_tokens.get("refresh_token") or refresh_token
+
+    if not new_access:
+        raise HTTPException(status_code=502, detail=f"새 {label} access_token 없음")
+
+    email = parse_userinfo(new_access)
+    if not email:
+        raise HTTPException(status_code=502, detail=f"{label} 이메일 없음")
+    return make_user_response(email, new_access, new_refresh)
 
 @router.get("/auth/user")
 def get_user_info(provider: str = Query(...), authorization: str = Header(...), db: Session = Depends(get_db)):
@@ -8,9 +8,10 @@ if project_root not in sys.path:
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.chat_history import router as chat_history_router
+from backend.chat_history import router as chat_history_router, title_worker
 from backend.calendars import router as calendars_router
 from backend.login import router as login_router
+from backend.http_client import aclose_all, close_all
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -21,6 +22,10 @@ DATABASE_URL = "sqlite:///./test.db"
 
 # 테이블 생성
 models.Base.metadata.create_all(bind=engine)
+# create_all은 이미 있는 테이블에 인덱스를 추가하지 않으므로 따로 확인해서 만든다
+for table in (models.Chatroom.__table__, models.Message.__table__):
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
 app = FastAPI()
 
 app.add_middleware(
@@ -35,6 +40,13 @@ app.include_router(chat_history_router, prefix="/api")
 app.include_router(calendars_router, prefix="/api")
 app.include_router(login_router, prefix="/api")
 
+@app.on_event("shutdown")
+async def shutdown_background():
+    # 제목 생성 워커와 OAuth provider 커넥션 풀 정리
+    title_worker.stop()
+    close_all()
+    await aclose_all()
+
 @app.get("/")
 async def root():
     return {"message": "backend 서버가 작동 중입니다."}
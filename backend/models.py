@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import create_engine, Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -24,6 +24,9 @@ class Chatroom(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # 사용자별 최근 대화순 목록 페이지 (updated_at desc, id desc)
+    __table_args__ = (Index("ix_chatrooms_user_updated", "id2", "updated_at", "id"),)
+
 class Message(Base):
     __tablename__ = "MESSAGES"
     
@@ -33,6 +36,9 @@ class Message(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     role = Column(String(50), nullable=False)
 
+    # 채팅방 메시지 커서 페이지: (created_at, id) 키셋을 인덱스 범위 탐색으로 처리
+    __table_args__ = (Index("ix_messages_room_created", "room_id", "created_at", "id"),)
+
 # Pydantic 모델
 class CalendarRequest(BaseModel):
     year: int
@@ -0,0 +1,85 @@
+# 채팅방 제목 생성 백그라운드 작업 큐: 요청 처리와 분리된 고정 크기 워커 풀 + 재시도
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TitleWorker:
+    """(채팅방 ID, 첫 질문)을 받아 워커 스레드에서 제목을 만들고 저장한다.
+
+    generate(content) -> 제목 문자열 (실패 시 예외), save(chat_id, title)은 DB 반영.
+    같은 채팅방이 대기 중이면 다시 넣지 않고, 큐가 가득 차면 제출을 거절한다(제목은 기본값 유지).
+    """
+
+    def __init__(self, generate: Callable[[str], str], save: Callable[[str, str], None],
+                 workers: int = 2, max_retries: int = 3, backoff: float = 1.0, queue_size: int = 1000):
+        self.generate = generate
+        self.save = save
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"title-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def submit(self, chat_id: str, content: str) -> bool:
+        self.start()
+        with self._lock:
+            if chat_id in self._pending:
+                return True
+            try:
+                self._queue.put_nowait((chat_id, content))
+            except queue.Full:
+                logger.warning(f"제목 생성 대기열이 가득 참: {chat_id}")
+                return False
+            self._pending.add(chat_id)
+        return True
+
+    def is_pending(self, chat_id: str) -> bool:
+        with self._lock:
+            return chat_id in self._pending
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            chat_id, content = item
+            try:
+                self._process(chat_id, content)
+            finally:
+                with self._lock:
+                    self._pending.discard(chat_id)
+                self._queue.task_done()
+
+    def _process(self, chat_id: str, content: str):
+        for attempt in range(self.max_retries):
+            try:
+                title = self.generate(content)
+                self.save(chat_id, title)
+                logger.info(f"제목 업데이트 성공: {title}")
+                return
+            except Exception as e:
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"제목 생성 실패 ({attempt + 1}/{self.max_retries}): {e}")
+                if attempt + 1 < self.max_retries:
+                    time.sleep(delay)
+        logger.error(f"제목 생성 포기: {chat_id}")
@@ -0,0 +1,75 @@
+# OAuth 토큰 검증 캐시: 액세스 토큰 해시 -> 확인된 사용자 (TTL + 크기 제한, 실패한 토큰은 짧게 기억)
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenCache:
+    """get_user_info_internal의 결과를 잠깐 기억해, 같은 토큰의 요청마다 provider API와 DB를 다시 부르지 않게 한다.
+
+    성공 결과는 (provider, 액세스 토큰)으로, 실패 결과는 (provider, 액세스 토큰, 리프레시 토큰)으로 저장한다.
+    토큰 원문은 저장하지 않고 SHA-256 해시만 키로 쓴다.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300, negative_ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # 키 -> (만료 시각, 값)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(*parts: Optional[str]) -> str:
+        return hashlib.sha256("\x00".join(p or "" for p in parts).encode("utf-8")).hexdigest()
+
+    def _get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_user(self, provider: str, access_token: str) -> Optional[dict]:
+        return self._get(self._key("user", provider, access_token))
+
+    def set_user(self, provider: str, access_token: str, user: dict):
+        self._set(self._key("user", provider, access_token), user, self.ttl)
+
+    def get_failure(self, provider: str, access_token: str, refresh_token: Optional[str]) -> Optional[tuple]:
+        """기억해 둔 (상태 코드, 메시지). 없으면 None"""
+        return self._get(self._key("fail", provider, access_token, refresh_token))
+
+    def set_failure(self, provider: str, access_token: str, refresh_token: Optional[str], status_code: int, detail):
+        """토큰이 확실히 무효(401)일 때만 부른다. provider 장애 같은 일시 오류는 기억하지 않는다"""
+        self._set(self._key("fail", provider, access_token, refresh_token), (status_code, detail), self.negative_ttl)
+
+    def invalidate(self, provider: str, access_token: str):
+        """토큰이 리프레시되어 더 이상 쓰이지 않을 때 이전 액세스 토큰 항목을 지운다"""
+        with self._lock:
+            self._entries.pop(self._key("user", provider, access_token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "300")),
+    negative_ttl=float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "30")),
+)
@@ -110,29 +110,28 @@ def make_json():
     print('전처리')
     with open('./data/backup_school_meal.json', 'r', encoding='utf-8') as f:
         file=json.load(f)
-        patt=re.compile(r'([^\.\ ]+)[\.\ ]')
-        exclude=re.compile(r'[\d\(]+')
+        # 메뉴 끝의 알레르기 유발 식품 번호 (예: 김치볶음밥1.5.6. / 닭갈비 (5.6.13))
+        allergy_tail=re.compile(r'\s*\(?((?:\d{1,2}\.)*\d{1,2})\.?\)?$')
         ans=[]
         for i in file:
             if i['날짜'][:6] != datetime.datetime.now().strftime('%Y%m'):
                 continue
             li=[]
+            allergy=[]
             for j in i['요리명'].split('<br/>'):
-                matt=patt.findall(j)
-                if matt != None:
-                    mli=""
-                    for k in matt:
-                        if exclude.match(k):
-                            # print(k, i['날짜'])
-                            continue
-                        mli+=k+" "
-                    mli=mli[:len(mli)-1]
-                    for l in range(len(mli)-1, -1, -1):
-                        if mli[l]!="." and False==mli[l].isdigit():
-                            break
-                    
-                    li.append(mli[:l+1])
+                name=j.strip()
+                codes=[]
+                tail=allergy_tail.search(name)
+                if tail:
+                    nums=[int(c) for c in tail.group(1).split('.')]
+                    # 1~19 밖의 숫자가 있으면 번호가 아니라 메뉴 이름의 일부 (예: 비타500)
+                    if all(1 <= c <= 19 for c in nums):
+                        codes=nums
+                        name=name[:tail.start()].rstrip()
+                li.append(name)
+                allergy.append(codes)
             i['요리명']=li
+            i['알레르기']=allergy
             ans.append(i)            
     with open('./data/school_meal.json', 'w', encoding='utf-8') as f:
         json.dump(ans, f, ensure_ascii=False, indent=2)